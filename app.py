@@ -3,7 +3,7 @@ Policy Scenario Builder - Flask Web Application
 Interactive web interface for Aadhaar policy impact prediction
 """
 
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, Response, stream_with_context
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -15,33 +15,206 @@ matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-from prediction_system import PolicyImpactPredictor
+from prediction_system import model_files
+from prediction_service import create_predictor, load_baseline_models, predict_scenario, predict_scenarios
+from result_cache import model_version
+from model_registry import ModelRegistry
 from visualization import PolicyImpactVisualizer
 from export_utils import export_manager
 from flask import send_file
+from job_queue import JobQueue, QueueFull
+from single_flight import SingleFlight
+from prediction_executor import PredictionExecutor
+from result_store import ResultStore
+from prediction_progress import report_stage
+from response_format import COLUMNAR_MEDIA_TYPE, MIN_COMPRESS_BYTES, to_columnar, compress, choose_encoding
+import hashlib
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
 
 app = Flask(__name__)
 
 # Global predictor instance (loaded once)
 predictor = None
+# Guards predictor setup shared by request and job threads
+predictor_lock = threading.RLock()
+# Prediction and filtering run in this many worker processes with preloaded
+# data and models (0: in the request thread, as under production_server.py).
+# Each holds its own copy of the data and models, so the default stays small
+PREDICTION_PROCESSES = int(os.environ.get('PREDICTION_PROCESSES', min(4, os.cpu_count() or 1)))
+prediction_executor = PredictionExecutor(PREDICTION_PROCESSES) if PREDICTION_PROCESSES > 0 else None
+# Coalesces identical concurrent requests dispatched to the worker processes
+request_flight = SingleFlight()
+# Responses kept server-side for /api/visualize and /api/export/* (by result_id);
+# on disk too, so pre-forked workers can serve each other's IDs
+result_store = ResultStore(ttl_seconds=float(os.environ.get('RESULT_TTL_SECONDS', 3600)),
+                           max_bytes=int(os.environ.get('RESULT_STORE_MB', 128)) * 1024 ** 2,
+                           disk_dir=".result_store")
 
 def initialize_predictor():
-    """Initialize the predictor on first request"""
+    """Initialize the predictor on first request (normally done by the startup warm-up)"""
     global predictor
-    if predictor is None:
-        print("Initializing predictor...")
-        predictor = PolicyImpactPredictor()
-        predictor.load_and_prepare_data(use_cached=True)
-        
-        # Train baseline models
-        try:
-            predictor.baseline_model.load_models()
-            print("Loaded existing baseline models")
-        except:
-            print("Training baseline models...")
-            predictor.train_baseline()
+    with predictor_lock:
+        if predictor is None:
+            print("Initializing predictor...")
+            pred = create_predictor()
+            load_baseline_models(pred)
+            predictor = pred
     return predictor
 
+# Startup warm-up stages, reported by /healthz and /readyz (with prediction
+# worker processes, each worker loads and warms up instead of this process)
+WARMUP_STAGES = (['prediction_workers'] if prediction_executor is not None
+                 else ['master_data', 'models', 'warmup_prediction'])
+warmup_state = {
+    'status': 'pending',
+    'started_at': None,
+    'finished_at': None,
+    'seconds': None,
+    'error': None,
+    'stages': {stage: {'status': 'pending', 'seconds': None} for stage in WARMUP_STAGES}
+}
+
+def run_warmup_stage(name, fn, *args):
+    """Run one warm-up stage, recording its status and duration"""
+    stage = warmup_state['stages'][name]
+    stage['status'] = 'running'
+    started = time.perf_counter()
+    try:
+        out = fn(*args)
+    except Exception as e:
+        stage['status'] = 'failed'
+        stage['error'] = str(e)
+        raise
+    finally:
+        stage['seconds'] = round(time.perf_counter() - started, 3)
+    stage['status'] = 'done'
+    print(f"Warm-up stage '{name}' done in {stage['seconds']:.2f}s")
+    return out
+
+def warm_up():
+    """
+    Load the master data and models and run one throwaway prediction
+    
+    Done by every prediction worker process when they are enabled, otherwise
+    in this process under the predictor lock, so requests arriving meanwhile
+    wait for the warm predictor instead of initializing a second one.
+    """
+    global predictor
+    warmup_state['status'] = 'warming'
+    warmup_state['started_at'] = time.time()
+    started = time.perf_counter()
+    try:
+        if prediction_executor is not None:
+            workers = run_warmup_stage('prediction_workers', prediction_executor.warm_up)
+            warmup_state['stages']['prediction_workers']['workers'] = workers
+        else:
+            with predictor_lock:
+                pred = predictor or run_warmup_stage('master_data', create_predictor)
+                if predictor is None:
+                    run_warmup_stage('models', load_baseline_models, pred)
+                    predictor = pred
+                run_warmup_stage('warmup_prediction', pred.warm_up)
+        warmup_state['status'] = 'ready'
+    except Exception as e:
+        traceback.print_exc()
+        warmup_state['status'] = 'failed'
+        warmup_state['error'] = str(e)
+    finally:
+        warmup_state['finished_at'] = time.time()
+        warmup_state['seconds'] = round(time.perf_counter() - started, 3)
+
+def start_warmup():
+    """Run the warm-up in a background thread (once per process)"""
+    with predictor_lock:
+        if warmup_state['status'] != 'pending':
+            return
+        warmup_state['status'] = 'starting'
+    threading.Thread(target=warm_up, name="warmup", daemon=True).start()
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness: the process serves requests; reports warm-up progress"""
+    return jsonify({'status': 'ok', 'warmup': warmup_state})
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness: 200 once the warm-up finished, 503 until then (or if it failed)"""
+    ready = warmup_state['status'] == 'ready'
+    return jsonify({'ready': ready, 'warmup': warmup_state}), 200 if ready else 503
+
+def response_format():
+    """'columnar' when the request asks for it (?format=, a "format" body field or Accept), else 'rows'"""
+    body = request.get_json(silent=True) if request.is_json else None
+    requested = request.args.get('format') or (body.get('format') if isinstance(body, dict) else None)
+    if requested:
+        return 'columnar' if requested == 'columnar' else 'rows'
+    best = request.accept_mimetypes.best_match(['application/json', COLUMNAR_MEDIA_TYPE])
+    return 'columnar' if best == COLUMNAR_MEDIA_TYPE else 'rows'
+
+def encode_prediction(response, fmt):
+    """A prediction response in the negotiated format"""
+    return to_columnar(response) if fmt == 'columnar' else response
+
+def prediction_etag(key):
+    """Weak ETag of the response stored under `key` in the negotiated format"""
+    return f"{key}-{response_format()}"
+
+def prediction_json(response, etag_key=None):
+    """
+    JSON response for a stored prediction, in the negotiated format
+    
+    Args:
+        etag_key: Key that identifies the response (see scenario_version);
+            tags it with a weak ETag so a matching If-None-Match gets 304
+            Not Modified. Default: no ETag
+    """
+    fmt = response_format()
+    if fmt == 'columnar':
+        result = app.response_class(app.json.dumps(to_columnar(response), separators=(',', ':')),
+                                    mimetype=COLUMNAR_MEDIA_TYPE)
+    else:
+        result = jsonify(response)
+    result.vary.add('Accept')
+    if etag_key is None:
+        return result
+    result.set_etag(prediction_etag(etag_key), weak=True)
+    result.cache_control.no_cache = True
+    return result.make_conditional(request)
+
+def not_modified(key):
+    """304 Not Modified if the request's If-None-Match names the response under `key`, else None"""
+    if not request.if_none_match.contains_weak(prediction_etag(key)):
+        return None
+    result = app.response_class(status=304)
+    result.vary.add('Accept')
+    result.set_etag(prediction_etag(key), weak=True)
+    result.cache_control.no_cache = True
+    return result
+
+@app.after_request
+def compress_response(response):
+    """Compress JSON, text and script bodies with the best encoding the client accepts (br or gzip)"""
+    if (response.direct_passthrough or response.is_streamed or response.status_code in (204, 304)
+            or response.status_code < 200 or 'Content-Encoding' in response.headers):
+        return response
+    mimetype = response.mimetype or ''
+    if not (mimetype.startswith('text/') or mimetype.endswith('json') or mimetype.endswith('javascript')):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    body = response.get_data()
+    if encoding is None or len(body) < MIN_COMPRESS_BYTES:
+        return response
+    response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
 @app.route('/')
 def index():
     """Main page - Policy Scenario Builder"""
@@ -96,269 +269,406 @@ def get_states():
     # Return only official states (already sorted)
     return jsonify({'states': sorted(official_states)})
 
-@app.route('/api/predict', methods=['POST'])
+@app.route('/api/predict', methods=['GET', 'POST'])
 def predict_policy_impact():
     """
     Main prediction endpoint
     Receives policy parameters and returns predictions
+    (blocks until done; see /api/jobs for the queued variant)
+    
+    GET takes the parameters as query arguments; its result_id and ETag are
+    derived from the scenario and the data and model versions, so refetching
+    a scenario that has not changed gets 304 Not Modified (or the stored
+    response) without predicting again. Both methods return the columnar
+    format when negotiated (see prediction_json).
     """
     try:
-        # Get policy parameters from request
-        data = request.json
-        
-        policy_name = data.get('policy_name', 'New Policy')
-        policy_date = data.get('policy_date')
-        policy_type = data.get('policy_type', 'Both')
-        age_groups = data.get('age_groups', [])
-        gender = data.get('gender', 'All')
-        states = data.get('states', [])
-        districts = data.get('districts', [])
-        compliance_level = float(data.get('compliance_level', 0.8))
-        forecast_days = int(data.get('forecast_days', 60))
-        
-        # Validate inputs
-        if not policy_date:
-            return jsonify({'error': 'Policy date is required'}), 400
-        
-        # Initialize predictor
-        pred = initialize_predictor()
-        
-        # Train policy model for this date
-        print(f"Training policy model for {policy_date}...")
-        pred.train_policy_model(policy_date)
-        
-        # Generate predictions
-        print(f"Generating predictions...")
-        results = pred.predict_policy_impact(
-            policy_date=policy_date,
-            forecast_days=forecast_days
-        )
-        
-        # Apply filters based on policy parameters
-        filtered_results = apply_policy_filters(
-            results, 
-            policy_type, 
-            age_groups, 
-            states, 
-            compliance_level,
-            forecast_days
-        )
-        
-        # Prepare response
-        response = {
-            'success': True,
-            'policy_name': policy_name,
-            'policy_date': policy_date,
-            'summary': {
-                'total_people_affected': int(filtered_results['total_affected']),
-                'total_enrolments': int(filtered_results['total_enrolments']),
-                'total_updates': int(filtered_results['total_updates']),
-                'peak_date': filtered_results['peak_date'],
-                'peak_volume': int(filtered_results['peak_volume']),
-                'duration_days': int(filtered_results['duration'])
-            },
-            'regional_impact': filtered_results['regional_data'],
-            'daily_impact': filtered_results['daily_data'],
-            'risk_assessment': filtered_results['risk_levels']
-        }
-        
-        return jsonify(response)
-        
+        if request.method == 'GET':
+            data = query_prediction_request()
+            key = scenario_version(data)
+            if key is None:
+                return prediction_json(run_prediction(data))
+            cached = not_modified(key)
+            if cached is not None:
+                return cached
+            entry = result_store.get(key)
+            if entry is not None:
+                return prediction_json({**entry['result'], 'result_id': key}, etag_key=key)
+            return prediction_json(finish_response(data, compute_prediction(data), result_id=key), etag_key=key)
+        return prediction_json(run_prediction(request.json))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"Error in prediction: {str(e)}")
         import traceback
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
-def apply_policy_filters(results, policy_type, age_groups, states, compliance_level, forecast_days=60):
+def scenario_key(policy_date, forecast_days, recursive):
+    """
+    Normalized (policy_date, forecast_days, recursive) of a request
+    
+    Raises:
+        ValueError: If the date cannot be parsed
+    """
+    try:
+        policy_date = pd.Timestamp(policy_date).strftime('%Y-%m-%d')
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid policy date: {policy_date}")
+    return policy_date, int(forecast_days), bool(recursive)
+
+# Largest Monte Carlo run per request: memory grows by ~4 KB per simulation
+# (~80 MB at the default for a 180-day forecast)
+MAX_SIMULATIONS = int(os.environ.get('MAX_SIMULATIONS', 20000))
+# Longest forecast period accepted per request
+MAX_FORECAST_DAYS = int(os.environ.get('MAX_FORECAST_DAYS', 365))
+
+def parse_prediction_request(data):
     """
-    Apply policy-specific filters to results
+    Scenario parameters of a prediction request
+    
+    Raises:
+        ValueError: If the parameters are invalid
+    """
+    policy_date = data.get('policy_date')
+    
+    # Validate inputs
+    if not policy_date:
+        raise ValueError('Policy date is required')
+    
+    try:
+        simulations = int(data.get('simulations', 10000))
+        # Query strings carry the seed as text
+        seed = None if data.get('seed') in (None, '') else int(data.get('seed'))
+    except (TypeError, ValueError):
+        raise ValueError('simulations and seed must be integers')
+    if not 1 <= simulations <= MAX_SIMULATIONS:
+        raise ValueError(f"simulations must be between 1 and {MAX_SIMULATIONS}")
+    try:
+        forecast_days = int(data.get('forecast_days', 60))
+        compliance_level = float(data.get('compliance_level', 0.8))
+    except (TypeError, ValueError):
+        raise ValueError('forecast_days must be an integer and compliance_level a number')
+    if not 1 <= forecast_days <= MAX_FORECAST_DAYS:
+        raise ValueError(f"forecast_days must be between 1 and {MAX_FORECAST_DAYS}")
+    if not 0 <= compliance_level <= 1:
+        raise ValueError('compliance_level must be between 0 and 1')
+    
+    params = {
+        'policy_date': policy_date,
+        'policy_type': data.get('policy_type', 'Both'),
+        'age_groups': data.get('age_groups', []),
+        'states': data.get('states', []),
+        'compliance_level': compliance_level,
+        'forecast_days': forecast_days,
+        'recursive': bool(data.get('recursive', False)),
+        'simulate': bool(data.get('simulate', False)),
+        'simulations': simulations,
+        'seed': seed
+    }
+    params['scenario'] = scenario_key(policy_date, params['forecast_days'], params['recursive'])
+    return params
+
+def finish_response(data, computed, result_id=None):
+    """
+    Complete a scenario's response with its request fields and store it under a result_id
     
     Args:
-        forecast_days: Number of days in forecast period (for duration calculation)
+        result_id: ID derived from the scenario (see scenario_version);
+            repeated requests then share one stored entry. Default: a new random ID
     """
-    summary = results['summary']
-    regional = results['regional_impact']
-    daily = results['daily_impact']
-    
-    # Apply compliance level adjustment
-    compliance_factor = compliance_level
-    
-    # Calculate filtered totals - use absolute values to prevent negatives
-    total_enrolments = abs(summary['total_enrolment_increase']) * compliance_factor
-    total_updates = abs(summary['total_update_increase']) * compliance_factor
-    
-    # DEBUG: Print values to understand what's happening
-    print(f"DEBUG - Raw values from model:")
-    print(f"  Enrolment increase: {summary['total_enrolment_increase']}")
-    print(f"  Update increase: {summary['total_update_increase']}")
-    print(f"  After compliance ({compliance_factor}):")
-    print(f"  Enrolments: {total_enrolments}")
-    print(f"  Updates: {total_updates}")
-    
-    # FALLBACK: If model predicts 0 updates but we know data has updates,
-    # use a reasonable estimate based on enrolments
-    if total_updates == 0 and policy_type in ['Both', 'Update']:
-        # Historical data shows updates are ~22x enrolments
-        # Use conservative 50% of enrolments as update estimate
-        total_updates = total_enrolments * 0.5
-        print(f"  FALLBACK: Model predicted 0 updates, using estimate: {total_updates}")
-    
-    # Apply policy type filter
-    if policy_type == 'Enrolment':
-        total_updates = 0
-        print(f"  Policy type 'Enrolment' - setting updates to 0")
-    elif policy_type == 'Update':
-        total_enrolments = 0
-        print(f"  Policy type 'Update' - setting enrolments to 0")
-    else:
-        print(f"  Policy type 'Both' - keeping both values")
-    # For 'Both', keep both values
-    
-    total_affected = total_enrolments + total_updates
-    
-    # Official list of valid states
-    valid_states = {
-        'Andhra Pradesh', 'Arunachal Pradesh', 'Assam', 'Bihar', 'Chhattisgarh',
-        'Goa', 'Gujarat', 'Haryana', 'Himachal Pradesh', 'Jharkhand',
-        'Karnataka', 'Kerala', 'Madhya Pradesh', 'Maharashtra', 'Manipur',
-        'Meghalaya', 'Mizoram', 'Nagaland', 'Odisha', 'Punjab',
-        'Rajasthan', 'Sikkim', 'Tamil Nadu', 'Telangana', 'Tripura',
-        'Uttar Pradesh', 'Uttarakhand', 'West Bengal',
-        'Andaman and Nicobar Islands', 'Chandigarh',
-        'Dadra and Nagar Haveli and Daman and Diu', 'Delhi',
-        'Jammu and Kashmir', 'Ladakh', 'Lakshadweep', 'Puducherry'
+    response = {
+        'success': True,
+        'policy_name': data.get('policy_name', 'New Policy'),
+        **computed
     }
     
-    # Filter regional data - ONLY official states
-    regional_data = []
-    for state in regional['total_impact'].keys():
-        # STRICT CHECK: Only include if in official list
-        if state not in valid_states:
-            continue
-            
-        # Skip if specific states selected and this state not in list
-        if states and 'All States' not in states and state not in states:
-            continue
-        
-        # Use absolute values to prevent negatives
-        enrol_impact = abs(regional['enrolment_impact'][state]) * compliance_factor
-        update_impact = abs(regional['update_impact'][state]) * compliance_factor
-        
-        # FALLBACK: If update is 0, use estimate based on enrolment
-        if update_impact == 0 and policy_type in ['Both', 'Update']:
-            update_impact = enrol_impact * 0.5
-        
-        if policy_type == 'Enrolment':
-            update_impact = 0
-        elif policy_type == 'Update':
-            enrol_impact = 0
-        # For 'Both', keep both values
-        
-        total_impact = enrol_impact + update_impact
-        
-        if total_impact > 0:
-            # Calculate percentage increase (mock calculation)
-            baseline = 10000  # Mock baseline
-            pct_increase = (total_impact / baseline) * 100
-            
-            # Determine risk level
-            if pct_increase > 50:
-                risk_level = 'High'
-            elif pct_increase > 25:
-                risk_level = 'Medium'
-            else:
-                risk_level = 'Low'
-            
-            regional_data.append({
-                'state': state,
-                'predicted_enrolments': int(enrol_impact),
-                'predicted_updates': int(update_impact),
-                'total_impact': int(total_impact),
-                'pct_increase': round(pct_increase, 1),
-                'risk_level': risk_level
-            })
-    
-    # DEBUG: Check regional updates
-    total_regional_updates = sum(r['predicted_updates'] for r in regional_data)
-    print(f"DEBUG - Regional data summary:")
-    print(f"  Total states: {len(regional_data)}")
-    print(f"  Total regional updates: {total_regional_updates}")
-    
-    # Sort by total impact
-    regional_data.sort(key=lambda x: x['total_impact'], reverse=True)
-    
-    # Prepare daily data - use absolute values
-    daily_data = []
-    for _, row in daily.iterrows():
-        # Use absolute values to prevent negatives
-        enrol = abs(row['enrolment_impact']) * compliance_factor
-        update = abs(row['update_impact']) * compliance_factor
-        
-        # FALLBACK: If update is 0, use estimate based on enrolment
-        if update == 0 and policy_type in ['Both', 'Update']:
-            update = enrol * 0.5
-        
-        if policy_type == 'Enrolment':
-            update = 0
-        elif policy_type == 'Update':
-            enrol = 0
-        # For 'Both', keep both values
-        
-        daily_data.append({
-            'date': row['date'].strftime('%Y-%m-%d'),
-            'enrolments': int(enrol),
-            'updates': int(update),
-            'total': int(enrol + update)
-        })
+    # Exports and charts refer to the stored response instead of uploading it again
+    if result_id is None:
+        return {**response, 'result_id': result_store.put(response)}
+    if result_store.get(result_id) is None:
+        result_store.put(response, result_id=result_id)
+    return {**response, 'result_id': result_id}
+
+def scenario_version(data):
+    """
+    Result ID of a scenario that changes with its parameters, the master data,
+    the saved models or the model registry; None if the response is not
+    reproducible (simulated bands without a seed)
+    
+    Only file hashes are read (cached by mtime and size), so this is cheap
+    enough to check before predicting.
+    
+    Raises:
+        ValueError: If the parameters are invalid
+    """
+    params = parse_prediction_request(data)
+    if params['simulate'] and params['seed'] is None:
+        return None
+    inputs = ["master_aadhaar_data.csv", *model_files(), ModelRegistry().path]
+    content = json.dumps({'policy_name': data.get('policy_name', 'New Policy'), 'params': params,
+                          'inputs': model_version(inputs)}, sort_keys=True, default=str)
+    return hashlib.sha256(content.encode()).hexdigest()[:32]
+
+def run_prediction(data, progress=None):
+    """
+    Predict one scenario from the request parameters and build the stored response
+    (see compute_prediction)
     
-    # DEBUG: Check if we have update data
-    total_daily_updates = sum(d['updates'] for d in daily_data)
-    print(f"DEBUG - Daily data summary:")
-    print(f"  Total days: {len(daily_data)}")
-    print(f"  Total daily updates: {total_daily_updates}")
-    print(f"  Sample first day: {daily_data[0] if daily_data else 'No data'}")
-    
-    # Find peak - ensure positive
-    if daily_data:
-        peak_day = max(daily_data, key=lambda x: x['total'])
-        peak_date = peak_day['date']
-        peak_volume = max(0, peak_day['total'])
+    Raises:
+        ValueError: If the parameters are invalid
+    """
+    return finish_response(data, compute_prediction(data, progress))
+
+def compute_prediction(data, progress=None):
+    """
+    Predicted and filtered response fields of one scenario (not yet stored)
+    
+    Args:
+        progress: Callback for stage and partial-result events (see
+            prediction_progress.py); such calls are not coalesced
+    
+    Raises:
+        ValueError: If the parameters are invalid
+    """
+    params = parse_prediction_request(data)
+    
+    if prediction_executor is None:
+        with report_stage(progress, 'loading'):
+            pred = initialize_predictor()
+        computed = predict_scenario(pred, params, progress)
+    elif progress is not None:
+        computed = prediction_executor.run(params, progress)
     else:
-        peak_date = policy_date
-        peak_volume = 0
-    
-    # Calculate duration - FIXED: Should equal forecast period exactly
-    # Use the forecast_days parameter directly instead of counting filtered data
-    # This ensures duration always matches the user's selected forecast period
-    duration = forecast_days
-    
-    # Risk assessment
-    risk_levels = {
-        'high_risk_states': [r['state'] for r in regional_data if r['risk_level'] == 'High'],
-        'medium_risk_states': [r['state'] for r in regional_data if r['risk_level'] == 'Medium'],
-        'low_risk_states': [r['state'] for r in regional_data if r['risk_level'] == 'Low']
-    }
+        key = json.dumps(params, sort_keys=True, default=str)
+        computed, shared = request_flight.do(key, lambda: prediction_executor.run(params))
+        if shared:
+            print(f"Shared in-flight prediction for {params['scenario']}")
     
-    return {
-        'total_affected': max(0, int(total_affected)),
-        'total_enrolments': max(0, int(total_enrolments)),
-        'total_updates': max(0, int(total_updates)),
-        'peak_date': peak_date,
-        'peak_volume': max(0, int(peak_volume)),
-        'duration': max(0, int(duration)),
-        'regional_data': regional_data,
-        'daily_data': daily_data,
-        'risk_levels': risk_levels
-    }
+    return computed
+
+# Largest number of scenarios accepted by /api/predict/batch
+MAX_BATCH_SCENARIOS = int(os.environ.get('MAX_BATCH_SCENARIOS', 500))
+
+def predict_batches(indexed_params):
+    """
+    Predict parsed scenarios, yielding (index, response fields or error) lists as they finish
+    
+    With prediction worker processes the policy dates are split into one
+    chunk of consecutive dates per worker, and each chunk is streamed back
+    as soon as its worker is done.
+    """
+    if prediction_executor is None:
+        yield predict_scenarios(initialize_predictor(), indexed_params)
+        return
+    
+    dates = sorted({params['scenario'][0] for _, params in indexed_params})
+    chunk_of = {date: i * prediction_executor.workers // len(dates) for i, date in enumerate(dates)}
+    chunks = {}
+    for index, params in indexed_params:
+        chunks.setdefault(chunk_of[params['scenario'][0]], []).append((index, params))
+    yield from prediction_executor.run_batches(list(chunks.values()))
+
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    Predict many scenarios in one request
+    
+    Takes {"scenarios": [...]}, each with the /api/predict parameters, and
+    streams one NDJSON line per scenario as it completes ({"index": i, ...}
+    with the /api/predict response, or an error), then a summary line.
+    """
+    data = request.json or {}
+    fmt = response_format()
+    scenarios = data.get('scenarios')
+    if not isinstance(scenarios, list) or not scenarios:
+        return jsonify({'error': 'scenarios must be a non-empty list'}), 400
+    if len(scenarios) > MAX_BATCH_SCENARIOS:
+        return jsonify({'error': f'At most {MAX_BATCH_SCENARIOS} scenarios per batch'}), 400
+    
+    indexed_params, invalid = [], []
+    for index, scenario in enumerate(scenarios):
+        try:
+            indexed_params.append((index, parse_prediction_request(scenario)))
+        except (ValueError, TypeError, AttributeError) as e:
+            invalid.append((index, str(e)))
+    
+    def line(index, outcome):
+        if isinstance(outcome, str):
+            body = {'index': index, 'success': False, 'error': outcome}
+        else:
+            body = {'index': index, **encode_prediction(finish_response(scenarios[index], outcome), fmt)}
+        return json.dumps(body) + '\n'
+    
+    def generate():
+        started = time.perf_counter()
+        failed = len(invalid)
+        for index, error in invalid:
+            yield line(index, error)
+        if indexed_params:
+            for batch in predict_batches(indexed_params):
+                for index, outcome in batch:
+                    failed += isinstance(outcome, str)
+                    yield line(index, outcome)
+        yield json.dumps({'done': True, 'scenarios': len(scenarios), 'failed': failed,
+                          'seconds': round(time.perf_counter() - started, 3)}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+# Seconds between keep-alive comments on an idle progress stream
+STREAM_KEEPALIVE_SECONDS = 15
+
+def sse_message(event, payload):
+    """One Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+def query_prediction_request():
+    """Prediction parameters from the query string (states and age_groups may repeat)"""
+    data = request.args.to_dict()
+    data['states'] = request.args.getlist('states')
+    data['age_groups'] = request.args.getlist('age_groups')
+    for flag in ('recursive', 'simulate'):
+        data[flag] = data.get(flag, '').lower() in ('1', 'true', 'yes')
+    return data
+
+@app.route('/api/predict/stream', methods=['GET'])
+def predict_stream():
+    """
+    Predict one scenario and stream its progress as Server-Sent Events
+    
+    Takes the /api/predict parameters as query arguments (repeat states and
+    age_groups for several values) so browsers can use EventSource. The
+    prediction runs as a job on the bounded /api/jobs workers (503 when the
+    queue is full). Sends 'job' events (queued with position, running),
+    'stage' events (started, then done or failed with seconds), 'source'
+    when a cache or the scenario table answers, a 'partial' event with the
+    national totals before the regional breakdown, and finally 'result'
+    (the /api/predict response) or 'failed'. Every event carries the
+    elapsed seconds.
+    """
+    data = query_prediction_request()
+    events = queue.Queue()
+    try:
+        parse_prediction_request(data)
+        job = prediction_jobs.submit(data, progress=events.put)
+    except ValueError as e:
+        # Invalid parameters are reported on the stream, where EventSource can read them
+        events.put({'event': 'failed', 'error': str(e), 'status': 400})
+        job = None
+    except QueueFull as e:
+        return jsonify({'error': str(e)}), 503
+    
+    def generate():
+        started = time.perf_counter()
+        while True:
+            try:
+                event = events.get(timeout=STREAM_KEEPALIVE_SECONDS)
+            except queue.Empty:
+                status = prediction_jobs.status(job.id) if job else None
+                if status and status['status'] == 'queued':
+                    event = {'event': 'job', 'job_id': job.id, 'status': 'queued', 'position': status['position']}
+                else:
+                    yield ": keep-alive\n\n"
+                    continue
+            name = event.pop('event')
+            if name == 'job' and event['status'] == 'done':
+                name, event = 'result', job.result
+            elif name == 'job' and event['status'] == 'failed':
+                name, event = 'failed', {'error': event['error'], 'status': 500}
+            yield sse_message(name, {**event, 'elapsed': round(time.perf_counter() - started, 3)})
+            if name in ('result', 'failed'):
+                return
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+class UnknownResult(Exception):
+    """Raised when a request names a result_id that is unknown or has expired"""
+
+def resolve_result(data):
+    """
+    Stored parts for the request's result_id, or the result posted in the body
+    
+    Returns:
+        Dictionary with 'result' (the prediction response) and, when known,
+        'viz_image'; an explicit viz_image in the body takes precedence
+    
+    Raises:
+        UnknownResult: If result_id is given but not (or no longer) stored
+    """
+    result_id = data.get('result_id')
+    if result_id:
+        entry = result_store.get(result_id)
+        if entry is None:
+            raise UnknownResult(f"Unknown or expired result_id '{result_id}'; please run the prediction again")
+        if data.get('viz_image'):
+            entry = {**entry, 'viz_image': data['viz_image']}
+        return entry
+    return {'result': data.get('result_data'), 'viz_image': data.get('viz_image')}
+
+# Background workers for /api/jobs; concurrency and queue bound are configurable
+prediction_jobs = JobQueue(run_prediction,
+                           max_workers=int(os.environ.get('PREDICTION_WORKERS', 2)),
+                           max_queued=int(os.environ.get('PREDICTION_QUEUE_SIZE', 100)))
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_prediction_job():
+    """Queue a prediction (same parameters as /api/predict) and return its job ID at once"""
+    data = request.json or {}
+    try:
+        # Invalid parameters are rejected here instead of failing in a worker slot
+        parse_prediction_request(data)
+        job = prediction_jobs.submit(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except QueueFull as e:
+        return jsonify({'error': str(e)}), 503
+    
+    status = prediction_jobs.status(job.id)
+    status.update({
+        'status_url': f'/api/jobs/{job.id}',
+        'result_url': f'/api/jobs/{job.id}/result'
+    })
+    return jsonify(status), 202
+
+@app.route('/api/jobs', methods=['GET'])
+def list_prediction_jobs():
+    """Running and queued jobs (with queue positions) and queue counters"""
+    return jsonify({'queue': prediction_jobs.summary(), 'jobs': prediction_jobs.pending()})
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def prediction_job_status(job_id):
+    """Status of a job: queued (with position), running, done or failed"""
+    status = prediction_jobs.status(job_id)
+    if status is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(status)
+
+@app.route('/api/jobs/<job_id>/result', methods=['GET'])
+def prediction_job_result(job_id):
+    """Result of a finished job (202 while it is still queued or running)"""
+    job = prediction_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    if job.status == 'failed':
+        return jsonify({'error': job.error}), 500
+    if job.status != 'done':
+        return jsonify(prediction_jobs.status(job_id)), 202
+    # A finished job's result never changes
+    return prediction_json(job.result, etag_key=job_id)
 
 @app.route('/api/visualize', methods=['POST'])
 def generate_visualization():
     """Generate visualization for the prediction"""
     try:
         data = request.json
-        daily_data = data.get('daily_data', [])
-        regional_data = data.get('regional_data', [])
+        if data.get('result_id'):
+            result = resolve_result(data)['result']
+            daily_data = result.get('daily_impact', [])
+            regional_data = result.get('regional_impact', [])
+        else:
+            daily_data = data.get('daily_data', [])
+            regional_data = data.get('regional_data', [])
         
         # Create figure with subplots
         fig, axes = plt.subplots(2, 2, figsize=(14, 10))
@@ -424,12 +734,19 @@ def generate_visualization():
         img_buffer.seek(0)
         img_base64 = base64.b64encode(img_buffer.read()).decode()
         plt.close()
+        image = f'data:image/png;base64,{img_base64}'
+        
+        # Kept with the stored result for the PDF and PowerPoint exports
+        if data.get('result_id'):
+            result_store.update(data['result_id'], viz_image=image)
         
         return jsonify({
             'success': True,
-            'image': f'data:image/png;base64,{img_base64}'
+            'image': image
         })
         
+    except UnknownResult as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         print(f"Error generating visualization: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -439,9 +756,10 @@ def export_pdf():
     """Export prediction results as PDF"""
     try:
         data = request.json
-        result_data = data.get('result_data')
-        policy_name = data.get('policy_name', 'Policy Report')
-        viz_image = data.get('viz_image')
+        stored = resolve_result(data)
+        result_data = stored['result']
+        policy_name = data.get('policy_name') or result_data.get('policy_name', 'Policy Report')
+        viz_image = stored.get('viz_image')
         
         pdf_buffer = export_manager.export_to_pdf(result_data, policy_name, viz_image)
         
@@ -451,6 +769,8 @@ def export_pdf():
             as_attachment=True,
             download_name=f'policy_impact_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
         )
+    except UnknownResult as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         print(f"Error generating PDF: {str(e)}")
         import traceback
@@ -462,8 +782,9 @@ def export_excel():
     """Export prediction results as Excel"""
     try:
         data = request.json
-        result_data = data.get('result_data')
-        policy_name = data.get('policy_name', 'Policy Report')
+        stored = resolve_result(data)
+        result_data = stored['result']
+        policy_name = data.get('policy_name') or result_data.get('policy_name', 'Policy Report')
         
         excel_buffer = export_manager.export_to_excel(result_data, policy_name)
         
@@ -473,6 +794,8 @@ def export_excel():
             as_attachment=True,
             download_name=f'policy_impact_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
         )
+    except UnknownResult as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         print(f"Error generating Excel: {str(e)}")
         import traceback
@@ -484,7 +807,7 @@ def export_csv():
     """Export prediction results as CSV"""
     try:
         data = request.json
-        result_data = data.get('result_data')
+        result_data = resolve_result(data)['result']
         
         csv_buffer = export_manager.export_to_csv(result_data)
         
@@ -494,6 +817,8 @@ def export_csv():
             as_attachment=True,
             download_name=f'policy_impact_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
         )
+    except UnknownResult as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         print(f"Error generating CSV: {str(e)}")
         import traceback
@@ -505,9 +830,10 @@ def export_powerpoint():
     """Export prediction results as PowerPoint"""
     try:
         data = request.json
-        result_data = data.get('result_data')
-        policy_name = data.get('policy_name', 'Policy Report')
-        viz_image = data.get('viz_image')
+        stored = resolve_result(data)
+        result_data = stored['result']
+        policy_name = data.get('policy_name') or result_data.get('policy_name', 'Policy Report')
+        viz_image = stored.get('viz_image')
         
         ppt_buffer = export_manager.export_to_powerpoint(result_data, policy_name, viz_image)
         
@@ -517,13 +843,27 @@ def export_powerpoint():
             as_attachment=True,
             download_name=f'policy_impact_presentation_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pptx'
         )
+    except UnknownResult as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         print(f"Error generating PowerPoint: {str(e)}")
         import traceback
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+# Warm up in the process that serves requests: the debug server's reloaded child
+# (its watcher process never serves), or any WSGI server started with APP_WARMUP=1
+# (never in prediction worker processes, which import this module too)
+if multiprocessing.parent_process() is None and (
+        os.environ.get('WERKZEUG_RUN_MAIN') == 'true' or os.environ.get('APP_WARMUP') == '1'):
+    start_warmup()
+
 if __name__ == '__main__':
+    if '--production' in sys.argv:
+        # Pre-forked workers sharing the warmed-up state (see production_server.py)
+        from production_server import main
+        main()
+        sys.exit(0)
     print("Starting Policy Scenario Builder...")
     print("Open http://localhost:5000 in your browser")
     app.run(debug=True, host='0.0.0.0', port=5000)
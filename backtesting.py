@@ -0,0 +1,368 @@
+"""
+Backtesting Module
+Rolling-origin (time-ordered) evaluation of the baseline and policy impact
+models, with folds run in parallel across cores
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from typing import Dict, List, Tuple
+import warnings
+warnings.filterwarnings('ignore')
+
+from feature_engineering import FeatureEngineer
+from baseline_model import BaselineModel
+from policy_impact_model import PolicyImpactModel
+from multi_output_model import make_joint_regressor
+from model_registry import ModelRegistry
+
+MODEL_CLASSES = ['baseline', 'policy_impact']
+TARGETS = {'enrolment': 'total_enrolments', 'update': 'total_updates'}
+
+# Features derived from whole-series state means; recomputed from training rows per fold
+STATE_MEAN_FEATURES = [
+    ('state_avg_enrolments', 'enrolment_deviation', 'total_enrolments'),
+    ('state_avg_updates', 'update_deviation', 'total_updates')
+]
+
+
+def rolling_origin_folds(dates: pd.Series, n_folds: int = 5, horizon_days: int = 14,
+                         min_train_days: int = 60, window_days: int = None) -> List[Tuple]:
+    """
+    Time-ordered train/test windows ending at the last date of the data
+
+    Each fold trains on everything up to its origin (or the last
+    `window_days` days if given) and tests on the following `horizon_days`.
+
+    Returns:
+        List of (train_start, origin, test_end) timestamps; training rows are
+        train_start <= date <= origin, test rows origin < date <= test_end
+    """
+    dates = pd.to_datetime(dates)
+    first, last = dates.min(), dates.max()
+    folds = []
+    for k in range(n_folds, 0, -1):
+        origin = last - pd.Timedelta(days=k * horizon_days)
+        if origin - first < pd.Timedelta(days=min_train_days):
+            continue
+        train_start = first if window_days is None else max(first, origin - pd.Timedelta(days=window_days))
+        folds.append((train_start, origin, origin + pd.Timedelta(days=horizon_days)))
+    if not folds:
+        raise ValueError(f"Not enough history for {n_folds} folds of {horizon_days} days "
+                         f"after {min_train_days} training days")
+    return folds
+
+
+def fold_windows(dates: pd.Series, **fold_options) -> List[Dict]:
+    """Rolling-origin folds expressed as day offsets from the first date (as used by the workers)"""
+    first = pd.to_datetime(dates).min()
+    return [
+        {
+            'fold': fold,
+            'train_start': (train_start - first).days,
+            'origin': (origin - first).days,
+            'test_end': (test_end - first).days,
+            'origin_date': str(origin.date())
+        }
+        for fold, (train_start, origin, test_end) in enumerate(rolling_origin_folds(dates, **fold_options), 1)
+    ]
+
+
+def regression_metrics(y_true, y_pred) -> Dict:
+    """MAE, RMSE and R² (R² is NaN for fewer than two rows)"""
+    return {
+        'mae': mean_absolute_error(y_true, y_pred),
+        'rmse': np.sqrt(mean_squared_error(y_true, y_pred)),
+        'r2': r2_score(y_true, y_pred) if len(y_true) > 1 else np.nan
+    }
+
+
+class FeatureCache:
+    """Feature matrix of the master data, built once and shared by all folds via memory map"""
+
+    def __init__(self, master_data: pd.DataFrame, policy_date: str, cache_dir: str = ".backtest_cache"):
+        self.master_data = master_data
+        self.policy_date = policy_date
+        self.cache_dir = cache_dir
+        key = hashlib.sha1(pd.util.hash_pandas_object(master_data, index=False).values.tobytes())
+        key.update(policy_date.encode())
+        self.prefix = os.path.join(cache_dir, f"features_{key.hexdigest()[:16]}")
+
+    def build(self) -> str:
+        """Create the cached matrix if missing; returns the cache prefix"""
+        if os.path.exists(f"{self.prefix}.json"):
+            print(f"Using cached feature matrix {self.prefix}")
+            return self.prefix
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        featured = FeatureEngineer(self.master_data).create_all_features(policy_date=self.policy_date)
+
+        columns = [col for col in featured.columns if col not in ('date', 'state')]
+        states, state_codes = np.unique(featured['state'].values, return_inverse=True)
+        day_numbers = (featured['date'] - featured['date'].min()).dt.days.values
+
+        np.save(f"{self.prefix}_matrix.npy", featured[columns].to_numpy(dtype=np.float64))
+        np.save(f"{self.prefix}_days.npy", day_numbers.astype(np.int32))
+        np.save(f"{self.prefix}_states.npy", state_codes.astype(np.int32))
+
+        empty = featured.head(0)
+        meta = {
+            'columns': columns,
+            'states': states.tolist(),
+            'first_date': str(featured['date'].min().date()),
+            'feature_cols': {
+                'baseline': BaselineModel().prepare_features(empty)[1],
+                'policy_impact': PolicyImpactModel().prepare_policy_features(empty)[1]
+            }
+        }
+        # Metadata is written last so a partial cache is never picked up
+        with open(f"{self.prefix}.json", 'w') as f:
+            json.dump(meta, f)
+
+        print(f"Feature matrix cached to {self.prefix} ({len(featured)} rows, {len(columns)} columns)")
+        return self.prefix
+
+    @staticmethod
+    def load(prefix: str) -> Dict:
+        """Open a cached matrix read-only without copying it into memory"""
+        with open(f"{prefix}.json") as f:
+            meta = json.load(f)
+        meta['matrix'] = np.load(f"{prefix}_matrix.npy", mmap_mode='r')
+        meta['days'] = np.load(f"{prefix}_days.npy", mmap_mode='r')
+        meta['state_codes'] = np.load(f"{prefix}_states.npy", mmap_mode='r')
+        return meta
+
+
+# Per-worker state: the memory-mapped cache is opened once per process
+_worker_cache = None
+
+
+def _init_worker(prefix: str):
+    """Process pool initializer: open the cached feature matrix"""
+    global _worker_cache
+    _worker_cache = FeatureCache.load(prefix)
+
+
+def fold_arrays(cache: Dict, task: Dict) -> Dict:
+    """
+    Slice one fold out of an opened feature cache
+
+    Returns train/test matrices (copies, with state-mean features recomputed
+    from the training window only), test state codes and the column indices
+    of the model class's features and of the targets.
+    """
+    col_index = {col: i for i, col in enumerate(cache['columns'])}
+
+    days = np.asarray(cache['days'])
+    train_rows = np.flatnonzero((days >= task['train_start']) & (days <= task['origin']))
+    test_rows = np.flatnonzero((days > task['origin']) & (days <= task['test_end']))
+
+    X_train = np.array(cache['matrix'][train_rows])
+    X_test = np.array(cache['matrix'][test_rows])
+    states_train = cache['state_codes'][train_rows]
+    states_test = cache['state_codes'][test_rows]
+
+    # State means must come from the training window only
+    for avg_col, dev_col, target_col in STATE_MEAN_FEATURES:
+        if avg_col not in col_index:
+            continue
+        target = X_train[:, col_index[target_col]]
+        means = (np.bincount(states_train, weights=target, minlength=len(cache['states'])) /
+                 np.maximum(np.bincount(states_train, minlength=len(cache['states'])), 1))
+        for X, codes in [(X_train, states_train), (X_test, states_test)]:
+            X[:, col_index[avg_col]] = means[codes]
+            if dev_col in col_index:
+                X[:, col_index[dev_col]] = X[:, col_index[target_col]] - means[codes]
+
+    return {
+        'X_train': X_train,
+        'X_test': X_test,
+        'states_test': states_test,
+        'feature_idx': [col_index[col] for col in cache['feature_cols'][task['model_class']]],
+        'target_idx': [col_index[TARGETS[name]] for name in TARGETS]
+    }
+
+
+def _run_fold(task: Dict) -> Dict:
+    """Train one model class on one fold and score its test window"""
+    cache = _worker_cache
+    fold = fold_arrays(cache, task)
+    X_train, X_test, states_test = fold['X_train'], fold['X_test'], fold['states_test']
+    feature_idx, target_idx = fold['feature_idx'], fold['target_idx']
+
+    start = time.perf_counter()
+    predictions = {}
+    if task['multi_output']:
+        both = (X_train[:, target_idx] > 0).all(axis=1)
+        model = make_joint_regressor()
+        model.fit(X_train[both][:, feature_idx], X_train[both][:, target_idx])
+        joint_pred = model.predict(X_test[:, feature_idx])
+        for i, name in enumerate(TARGETS):
+            predictions[name] = joint_pred[:, i]
+    else:
+        for name, i in zip(TARGETS, target_idx):
+            mask = X_train[:, i] > 0
+            model = GradientBoostingRegressor(**task['params'])
+            model.fit(X_train[mask][:, feature_idx], X_train[mask, i])
+            predictions[name] = model.predict(X_test[:, feature_idx])
+    fit_seconds = time.perf_counter() - start
+
+    fold_rows, state_rows = [], []
+    for name, i in zip(TARGETS, target_idx):
+        y_true = X_test[:, i]
+        # Rows with no recorded activity are not scored (same rule as training)
+        scored = y_true > 0
+        fold_rows.append({
+            'fold': task['fold'],
+            'model_class': task['model_class'],
+            'target': name,
+            'origin': task['origin_date'],
+            'train_rows': int(len(X_train)),
+            'test_rows': int(scored.sum()),
+            'fit_seconds': round(fit_seconds, 2),
+            **regression_metrics(y_true[scored], predictions[name][scored])
+        })
+        state_rows.append(pd.DataFrame({
+            'fold': task['fold'],
+            'model_class': task['model_class'],
+            'target': name,
+            'state': np.asarray(cache['states'])[states_test[scored]],
+            'actual': y_true[scored],
+            'predicted': predictions[name][scored]
+        }))
+
+    return {'folds': fold_rows, 'predictions': pd.concat(state_rows, ignore_index=True)}
+
+
+class RollingOriginBacktester:
+    """Rolling-origin backtest of both model classes over the master dataset"""
+
+    def __init__(self, master_data: pd.DataFrame, n_folds: int = 5, horizon_days: int = 14,
+                 min_train_days: int = 60, window_days: int = None,
+                 policy_date: str = "2025-03-15", multi_output: bool = False,
+                 params: Dict = None, n_jobs: int = None, cache_dir: str = ".backtest_cache"):
+        self.master_data = master_data
+        self.n_folds = n_folds
+        self.horizon_days = horizon_days
+        self.min_train_days = min_train_days
+        self.window_days = window_days
+        self.policy_date = policy_date
+        self.multi_output = multi_output
+        # Hyperparameters per model class (overrides on top of the classes' MODEL_PARAMS)
+        params = params or {}
+        self.params = {
+            'baseline': {**BaselineModel.MODEL_PARAMS, **params.get('baseline', {})},
+            'policy_impact': {**PolicyImpactModel.MODEL_PARAMS, **params.get('policy_impact', {})}
+        }
+        self.n_jobs = n_jobs or os.cpu_count()
+        self.cache = FeatureCache(master_data, policy_date, cache_dir)
+
+    def _tasks(self) -> List[Dict]:
+        """One task per (fold, model class), with fold bounds as day offsets"""
+        folds = fold_windows(self.master_data['date'], n_folds=self.n_folds,
+                             horizon_days=self.horizon_days, min_train_days=self.min_train_days,
+                             window_days=self.window_days)
+        return [
+            {**fold, 'model_class': model_class, 'params': self.params[model_class],
+             'multi_output': self.multi_output}
+            for fold in folds
+            for model_class in MODEL_CLASSES
+        ]
+
+    def run(self) -> Dict[str, pd.DataFrame]:
+        """
+        Run all folds in parallel
+
+        Returns:
+            Dictionary with per-fold metrics ('folds'), per-state metrics over
+            all test windows ('states') and the mean per model class ('summary')
+        """
+        prefix = self.cache.build()
+        tasks = self._tasks()
+        print(f"Backtesting {len(tasks)} fold/model tasks on {min(self.n_jobs, len(tasks))} workers...")
+
+        with ProcessPoolExecutor(max_workers=min(self.n_jobs, len(tasks)),
+                                 initializer=_init_worker, initargs=(prefix,)) as pool:
+            outputs = list(pool.map(_run_fold, tasks))
+
+        folds = pd.DataFrame([row for out in outputs for row in out['folds']])
+        predictions = pd.concat([out['predictions'] for out in outputs], ignore_index=True)
+
+        states = pd.DataFrame([
+            {'model_class': model_class, 'target': target, 'state': state, 'rows': len(group),
+             **regression_metrics(group['actual'], group['predicted'])}
+            for (model_class, target, state), group in predictions.groupby(['model_class', 'target', 'state'])
+        ])
+        summary = folds.groupby(['model_class', 'target'])[['mae', 'rmse', 'r2']].mean().reset_index()
+
+        return {'folds': folds, 'states': states, 'summary': summary}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the prediction models")
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--horizon', type=int, default=14, help="Test window per fold (days)")
+    parser.add_argument('--min-train-days', type=int, default=60)
+    parser.add_argument('--window', type=int, help="Sliding training window (days); default expands")
+    parser.add_argument('--policy-date', default="2025-03-15", help="Policy date for the impact model features")
+    parser.add_argument('--multi-output', action='store_true', help="Backtest the experimental joint models")
+    parser.add_argument('--tuned', action='store_true',
+                        help="Use the tuned hyperparameters from the model registry")
+    parser.add_argument('--jobs', type=int, help="Worker processes (default: all cores)")
+    parser.add_argument('--output', help="Directory to write folds.csv, states.csv and summary.csv")
+    parser.add_argument('--min-r2', type=float,
+                        help="Promotion gate: exit non-zero if any mean R² is below this")
+    args = parser.parse_args()
+
+    params = {}
+    if args.tuned:
+        registry = ModelRegistry()
+        for model_class in MODEL_CLASSES:
+            params[model_class] = registry.get(model_class).get('tuned_params', {})
+
+    master_data = pd.read_csv("master_aadhaar_data.csv")
+    backtester = RollingOriginBacktester(
+        master_data, n_folds=args.folds, horizon_days=args.horizon,
+        min_train_days=args.min_train_days, window_days=args.window,
+        policy_date=args.policy_date, multi_output=args.multi_output,
+        params=params, n_jobs=args.jobs
+    )
+    start = time.perf_counter()
+    results = backtester.run()
+
+    print("\n" + "=" * 80)
+    print("PER-FOLD METRICS")
+    print("=" * 80)
+    print(results['folds'].to_string(index=False, float_format=lambda v: f"{v:,.3f}"))
+    print("\n" + "=" * 80)
+    print("MEAN OVER FOLDS")
+    print("=" * 80)
+    print(results['summary'].to_string(index=False, float_format=lambda v: f"{v:,.3f}"))
+    print(f"\nBacktest completed in {time.perf_counter() - start:.1f}s")
+
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+        for name, frame in results.items():
+            frame.to_csv(os.path.join(args.output, f"{name}.csv"), index=False)
+        print(f"Results written to {args.output}/")
+
+    if args.min_r2 is not None:
+        failing = results['summary'][results['summary']['r2'] < args.min_r2]
+        if len(failing):
+            print(f"\nGATE FAILED: mean R² below {args.min_r2} for:")
+            print(failing.to_string(index=False))
+            sys.exit(1)
+        print(f"\nGATE PASSED: all mean R² >= {args.min_r2}")
+
+
+if __name__ == "__main__":
+    main()
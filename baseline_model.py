@@ -10,15 +10,38 @@ from sklearn.linear_model import LinearRegression
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import joblib
-from typing import Dict, Tuple
+import os
+from typing import Dict, Tuple, List
+
+from multi_output_model import JOINT_TARGETS, make_joint_regressor, joint_target_frame, joint_metrics
+from incremental_training import recent_window, rows_after, reference_mae, refresh_estimator
 
 class BaselineModel:
     """Model to learn baseline enrolment and update patterns"""
     
-    def __init__(self):
+    # Gradient boosting hyperparameters for the per-target models
+    MODEL_PARAMS = {
+        'n_estimators': 100,
+        'learning_rate': 0.1,
+        'max_depth': 5,
+        'random_state': 42
+    }
+    
+    # Pickle file and memory-mapped artifact directory (benchmark_model_loading.py) of each model
+    ARTIFACTS = {
+        'enrolment_model': ("enrolment_baseline_model.pkl", "enrolment_baseline"),
+        'update_model': ("update_baseline_model.pkl", "update_baseline"),
+        'joint_model': ("joint_baseline_model.pkl", "joint_baseline")
+    }
+    
+    def __init__(self, params: Dict = None):
+        # Tuned hyperparameters override the defaults
+        self.params = {**self.MODEL_PARAMS, **(params or {})}
         self.enrolment_model = None
         self.update_model = None
+        self.joint_model = None
         self.feature_cols = None
+        self.metrics = {}
         
     def prepare_features(self, df: pd.DataFrame, exclude_policy: bool = True) -> Tuple[pd.DataFrame, List]:
         """Prepare features for modeling"""
@@ -54,12 +77,7 @@ class BaselineModel:
         )
         
         # Train Gradient Boosting model
-        model = GradientBoostingRegressor(
-            n_estimators=100,
-            learning_rate=0.1,
-            max_depth=5,
-            random_state=42
-        )
+        model = GradientBoostingRegressor(**self.params)
         
         model.fit(X_train, y_train)
         
@@ -76,6 +94,7 @@ class BaselineModel:
         
         self.enrolment_model = model
         self.feature_cols = feature_cols
+        self.metrics['enrolment'] = metrics
         
         return metrics
     
@@ -96,12 +115,7 @@ class BaselineModel:
         )
         
         # Train Gradient Boosting model
-        model = GradientBoostingRegressor(
-            n_estimators=100,
-            learning_rate=0.1,
-            max_depth=5,
-            random_state=42
-        )
+        model = GradientBoostingRegressor(**self.params)
         
         model.fit(X_train, y_train)
         
@@ -117,16 +131,106 @@ class BaselineModel:
         print(f"Update Model - MAE: {metrics['mae']:.2f}, RMSE: {metrics['rmse']:.2f}, R²: {metrics['r2']:.4f}")
         
         self.update_model = model
+        self.metrics['update'] = metrics
         
         return metrics
     
+    def train_joint_model(self, df: pd.DataFrame, test_size: float = 0.2) -> Dict:
+        """Train one multi-output model for enrolments and updates"""
+        print("Training joint baseline model (enrolments + updates)...")
+        
+        X, feature_cols = self.prepare_features(df)
+        
+        # Keep rows where both targets have data
+        y = joint_target_frame(df)
+        X = X.loc[y.index]
+        
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=test_size, random_state=42
+        )
+        
+        model = make_joint_regressor()
+        model.fit(X_train, y_train)
+        
+        # Evaluate both targets from a single predict
+        metrics = joint_metrics(y_test, model.predict(X_test))
+        
+        print(f"Joint Model - Enrolment MAE: {metrics['enrolment']['mae']:.2f}, R²: {metrics['enrolment']['r2']:.4f} | "
+              f"Update MAE: {metrics['update']['mae']:.2f}, R²: {metrics['update']['r2']:.4f}")
+        
+        self.joint_model = model
+        self.feature_cols = feature_cols
+        self.metrics = metrics
+        
+        return metrics
+    
+    def incremental_update(self, df: pd.DataFrame, recent_days: int = 30, extra_estimators: int = 20,
+                           drift_threshold: float = 0.25, reference_metrics: Dict = None,
+                           trained_through: str = None, max_estimators: int = None) -> Dict:
+        """
+        Refresh trained models with the latest data instead of refitting from zero
+        
+        Drift is measured on the rows after `trained_through` (the last date
+        the models were trained on; default: the last `recent_days` days).
+        Each model is warm-started with `extra_estimators` trees fit on the last
+        `recent_days` days, or refit with the configured parameters if that
+        drift exceeds `drift_threshold` relative to the reference holdout MAE,
+        or if it would grow past `max_estimators` trees (default: twice the
+        configured number). Refits replace the models' holdout metrics.
+        
+        Returns:
+            Report of the action taken per model
+        """
+        print(f"Incrementally updating baseline models (last {recent_days} days)...")
+        
+        X, _ = self.prepare_features(df)
+        recent = recent_window(df, recent_days)
+        new = rows_after(df, trained_through) if trained_through else recent
+        self.metrics = dict(reference_metrics or self.metrics)
+        report = {}
+        
+        if self.joint_model is not None:
+            y = joint_target_frame(df)
+            self.joint_model, report['joint'] = refresh_estimator(
+                self.joint_model, X.loc[y.index], y, recent.loc[y.index], new.loc[y.index],
+                make_joint_regressor, reference_mae(self.metrics), extra_estimators,
+                max_estimators or 2 * make_joint_regressor().regressor.n_estimators, drift_threshold,
+                score=joint_metrics
+            )
+            if 'metrics' in report['joint']:
+                self.metrics = report['joint']['metrics']
+        else:
+            for name, target, attr in [('enrolment', 'total_enrolments', 'enrolment_model'),
+                                       ('update', 'total_updates', 'update_model')]:
+                y = df[target]
+                mask = y > 0
+                model, report[name] = refresh_estimator(
+                    getattr(self, attr), X[mask], y[mask], recent[mask], new[mask],
+                    lambda: GradientBoostingRegressor(**self.params), reference_mae(self.metrics.get(name)),
+                    extra_estimators, max_estimators or 2 * self.params['n_estimators'], drift_threshold
+                )
+                setattr(self, attr, model)
+                if 'metrics' in report[name]:
+                    self.metrics[name] = report[name]['metrics']
+        
+        for name, step in report.items():
+            print(f"  {name}: {step['action']} ({step.get('seconds', 0):.2f}s)")
+        
+        return report
+    
     def predict_baseline(self, df: pd.DataFrame) -> pd.DataFrame:
         """Predict baseline enrolments and updates"""
         X, _ = self.prepare_features(df)
         
         df_pred = df.copy()
-        df_pred['predicted_enrolments'] = self.enrolment_model.predict(X)
-        df_pred['predicted_updates'] = self.update_model.predict(X)
+        if self.joint_model is not None:
+            # One traversal scores both targets
+            joint_pred = self.joint_model.predict(X)
+            df_pred['predicted_enrolments'] = joint_pred[:, JOINT_TARGETS.index('total_enrolments')]
+            df_pred['predicted_updates'] = joint_pred[:, JOINT_TARGETS.index('total_updates')]
+        else:
+            df_pred['predicted_enrolments'] = self.enrolment_model.predict(X)
+            df_pred['predicted_updates'] = self.update_model.predict(X)
         
         return df_pred
     
@@ -143,6 +247,16 @@ class BaselineModel:
         self.enrolment_model = joblib.load(enrol_path)
         self.update_model = joblib.load(update_path)
         print("Models loaded successfully")
+    
+    def save_joint_model(self, path: str = "joint_baseline_model.pkl"):
+        """Save trained multi-output model"""
+        joblib.dump(self.joint_model, path)
+        print(f"Joint model saved to {path}")
+    
+    def load_joint_model(self, path: str = "joint_baseline_model.pkl"):
+        """Load trained multi-output model"""
+        self.joint_model = joblib.load(path)
+        print("Joint model loaded successfully")
 
 if __name__ == "__main__":
     # Load featured data
@@ -0,0 +1,181 @@
+"""
+Model Loading Benchmark
+Compares startup cost of pickled models (joblib.load) against the
+memory-mapped tree artifacts, with a cold and a warm page cache, and
+their scoring time on the forecast grids the web app serves
+"""
+
+import contextlib
+import glob
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+import warnings
+warnings.filterwarnings('ignore')
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from baseline_model import BaselineModel
+from policy_impact_model import PolicyImpactModel
+from tree_artifacts import export_ensemble, is_fresh, MappedEnsemble
+
+ARTIFACT_DIR = "model_artifacts"
+RUNS = 3
+# Forecast periods scored per request (the horizons plus a year)
+SCORING_DAYS = [30, 60, 90, 180, 365]
+
+# Executed in a fresh interpreter so every measurement starts with an empty process
+LOADER = r"""
+import json, sys, time, warnings
+warnings.filterwarnings('ignore')
+from baseline_model import BaselineModel
+from policy_impact_model import PolicyImpactModel
+from benchmark_model_loading import load_artifacts
+
+def private_kb():
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line)
+        return sum(int(fields[k].split()[0]) for k in ('Private_Clean', 'Private_Dirty'))
+    except OSError:
+        return None
+
+fmt = sys.argv[1]
+before = private_kb()
+start = time.perf_counter()
+baseline, policy = BaselineModel(), PolicyImpactModel()
+if fmt == 'pickle':
+    baseline.load_models()
+    policy.load_models()
+else:
+    load_artifacts(baseline, policy)
+seconds = time.perf_counter() - start
+after = private_kb()
+print(json.dumps({'seconds': seconds,
+                  'private_kb': None if before is None else after - before}))
+"""
+
+
+def load_artifacts(baseline: BaselineModel, policy: PolicyImpactModel, directory: str = ARTIFACT_DIR):
+    """
+    Memory-map the trained model pairs instead of unpickling them
+
+    Artifacts that are missing or older than their pickle are exported
+    from the pickle first. Mapped models can predict but not be retrained.
+    """
+    for model, attrs in ((baseline, ['enrolment_model', 'update_model']),
+                         (policy, ['enrolment_impact_model', 'update_impact_model'])):
+        for attr in attrs:
+            pickle_path, name = model.ARTIFACTS[attr]
+            path = os.path.join(directory, name)
+            if not is_fresh(path, pickle_path):
+                export_ensemble(joblib.load(pickle_path), path)
+            setattr(model, attr, MappedEnsemble(path))
+    policy.feature_cols = list(policy.enrolment_impact_model.feature_names_in_)
+
+
+def model_files(fmt: str):
+    """Files read when loading the models in the given format"""
+    if fmt == 'pickle':
+        return [path for path, _ in list(BaselineModel.ARTIFACTS.values()) + list(PolicyImpactModel.ARTIFACTS.values())
+                if os.path.exists(path)] + ["policy_feature_cols.pkl"]
+    return glob.glob(os.path.join(ARTIFACT_DIR, "*", "*"))
+
+
+def evict(paths):
+    """Drop files from the page cache (best effort; Linux/posix only)"""
+    if not hasattr(os, 'posix_fadvise'):
+        return False
+    for path in paths:
+        with open(path, 'rb') as f:
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+    return True
+
+
+def measure(fmt: str, cold: bool):
+    """Average load time and private memory over RUNS fresh processes"""
+    samples = []
+    for _ in range(RUNS):
+        if cold:
+            evict(model_files(fmt))
+        out = subprocess.run([sys.executable, '-c', LOADER, fmt], capture_output=True, text=True, check=True)
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    frame = pd.DataFrame(samples)
+    return {
+        'format': fmt,
+        'cache': 'cold' if cold else 'warm',
+        'load_ms': frame['seconds'].mean() * 1000,
+        'private_mb': frame['private_kb'].mean() / 1024 if frame['private_kb'].notna().all() else float('nan')
+    }
+
+
+def measure_scoring(policy_date: str = "2026-03-01"):
+    """Mean time to score one forecast grid (baseline + policy impact) with each model format"""
+    from feature_engineering import FeatureEngineer
+    from prediction_system import PolicyImpactPredictor
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        predictor = PolicyImpactPredictor()
+        predictor.load_and_prepare_data()
+        predictor.load_models()
+        mapped = (BaselineModel(), PolicyImpactModel())
+        load_artifacts(*mapped)
+        models = {'pickle': (predictor.baseline_model, predictor.policy_model), 'mmap': mapped}
+
+    rows = []
+    for days in SCORING_DAYS:
+        dates = predictor._forecast_dates(policy_date, days)
+        with contextlib.redirect_stdout(io.StringIO()):
+            featured = FeatureEngineer(predictor._build_forecast_frame(dates)).create_all_features(
+                policy_date=policy_date)
+        row = {'forecast_days': days, 'rows': len(featured)}
+        for fmt, (baseline, policy) in models.items():
+            with contextlib.redirect_stdout(io.StringIO()):
+                policy.calculate_policy_impact(featured, baseline.predict_baseline(featured))
+                start = time.perf_counter()
+                for _ in range(RUNS * 3):
+                    policy.calculate_policy_impact(featured, baseline.predict_baseline(featured))
+            row[f'{fmt}_ms'] = (time.perf_counter() - start) / (RUNS * 3) * 1000
+        rows.append(row)
+    return rows
+
+
+def main():
+    print("=" * 80)
+    print("MODEL LOADING BENCHMARK")
+    print("=" * 80)
+
+    # Make sure the artifacts exist and predict exactly like the pickles
+    pickled, mapped = BaselineModel(), BaselineModel()
+    pickled.load_models()
+    load_artifacts(mapped, PolicyImpactModel())
+    columns = list(pickled.enrolment_model.feature_names_in_)
+    X = pd.DataFrame(np.random.default_rng(0).uniform(0, 1000, (500, len(columns))), columns=columns)
+    diff = np.abs(pickled.enrolment_model.predict(X) - mapped.enrolment_model.predict(X)).max()
+    print(f"Max prediction difference (pickle vs mmap): {diff:.2e}")
+
+    sizes = {fmt: sum(os.path.getsize(p) for p in model_files(fmt)) / 1e6 for fmt in ('pickle', 'mmap')}
+    print(f"On-disk size: pickles {sizes['pickle']:.2f} MB, artifacts {sizes['mmap']:.2f} MB")
+    if not hasattr(os, 'posix_fadvise'):
+        print("posix_fadvise unavailable: 'cold' runs cannot evict the page cache")
+
+    results = [measure(fmt, cold) for fmt in ('pickle', 'mmap') for cold in (True, False)]
+
+    print("\n" + "=" * 80)
+    print(f"RESULTS (mean of {RUNS} fresh processes; private_mb = memory not shareable between workers)")
+    print("=" * 80)
+    print(pd.DataFrame(results).to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+
+    print("\n" + "=" * 80)
+    print("SCORING TIME PER FORECAST GRID (baseline + policy impact, per request)")
+    print("=" * 80)
+    print(pd.DataFrame(measure_scoring()).to_string(index=False, float_format=lambda v: f"{v:,.1f}"))
+
+
+if __name__ == "__main__":
+    main()
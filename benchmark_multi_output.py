@@ -0,0 +1,124 @@
+"""
+Multi-Output Model Benchmark
+Compares the joint enrolment+update model against the two-model setup
+(accuracy on a shared holdout, training time and inference time)
+"""
+
+import time
+import warnings
+warnings.filterwarnings('ignore')
+
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from feature_engineering import FeatureEngineer
+from baseline_model import BaselineModel
+from policy_impact_model import PolicyImpactModel
+from multi_output_model import joint_target_frame, joint_metrics
+
+TRAINING_POLICY_DATE = "2025-03-15"
+PREDICT_REPEATS = 5
+
+
+def split_holdout(featured: pd.DataFrame, test_size: float = 0.2):
+    """Hold out rows where both targets exist so both setups are scored on the same rows"""
+    test_index = train_test_split(joint_target_frame(featured).index,
+                                  test_size=test_size, random_state=42)[1]
+    return featured.drop(index=test_index), featured.loc[test_index]
+
+
+def time_call(fn, repeats: int = 1):
+    """Return (result, average seconds) for fn()"""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeats
+
+
+def benchmark_pair(name, train_pair, train_joint, predict, pred_cols, train_df, test_df):
+    """Train both setups on train_df and score them on test_df"""
+    rows = []
+    for setup, train in [('two-model', train_pair), ('joint', train_joint)]:
+        _, train_time = time_call(train)
+        pred, predict_time = time_call(lambda: predict(setup, test_df), PREDICT_REPEATS)
+        metrics = joint_metrics(joint_target_frame(test_df), pred[pred_cols].values)
+        rows.append({
+            'model': name,
+            'setup': setup,
+            'train_s': train_time,
+            'predict_ms': predict_time * 1000,
+            'enrol_mae': metrics['enrolment']['mae'],
+            'enrol_r2': metrics['enrolment']['r2'],
+            'update_mae': metrics['update']['mae'],
+            'update_r2': metrics['update']['r2']
+        })
+    return rows
+
+
+def main():
+    print("=" * 80)
+    print("MULTI-OUTPUT MODEL BENCHMARK")
+    print("=" * 80)
+
+    master_data = pd.read_csv("master_aadhaar_data.csv")
+    results = []
+
+    # Baseline models (no policy features)
+    featured = FeatureEngineer(master_data).create_all_features(policy_date=None)
+    train_df, test_df = split_holdout(featured)
+    baseline = BaselineModel()
+
+    def train_baseline_pair():
+        baseline.joint_model = None
+        baseline.train_enrolment_model(train_df)
+        baseline.train_update_model(train_df)
+
+    def train_baseline_joint():
+        baseline.train_joint_model(train_df)
+
+    def predict_baseline(setup, df):
+        # The joint model takes precedence when present
+        saved = baseline.joint_model
+        if setup == 'two-model':
+            baseline.joint_model = None
+        pred = baseline.predict_baseline(df)
+        baseline.joint_model = saved
+        return pred
+
+    results += benchmark_pair('baseline', train_baseline_pair, train_baseline_joint,
+                              predict_baseline, ['predicted_enrolments', 'predicted_updates'],
+                              train_df, test_df)
+
+    # Policy impact models (with policy features)
+    featured = FeatureEngineer(master_data).create_all_features(policy_date=TRAINING_POLICY_DATE)
+    train_df, test_df = split_holdout(featured)
+    policy = PolicyImpactModel()
+
+    def train_policy_pair():
+        policy.joint_impact_model = None
+        policy.train_impact_models(train_df, TRAINING_POLICY_DATE)
+
+    def train_policy_joint():
+        policy.train_joint_impact_model(train_df, TRAINING_POLICY_DATE)
+
+    def predict_policy(setup, df):
+        saved = policy.joint_impact_model
+        if setup == 'two-model':
+            policy.joint_impact_model = None
+        pred = policy.predict_with_policy(df)
+        policy.joint_impact_model = saved
+        return pred
+
+    results += benchmark_pair('policy impact', train_policy_pair, train_policy_joint,
+                              predict_policy,
+                              ['predicted_enrolments_with_policy', 'predicted_updates_with_policy'],
+                              train_df, test_df)
+
+    print("\n" + "=" * 80)
+    print("RESULTS (shared holdout, rows with both targets)")
+    print("=" * 80)
+    print(pd.DataFrame(results).to_string(index=False, float_format=lambda v: f"{v:,.3f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Web Server Load Test
+Starts the production server with 1, 2, 4... workers and measures
+prediction throughput, latency and memory sharing for each
+"""
+
+import argparse
+import http.client
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime
+from multiprocessing import Pool
+
+import numpy as np
+
+FORECAST_DAYS = [30, 60, 90, 180]
+
+
+def _request(conn: http.client.HTTPConnection, method: str, path: str, body: dict = None):
+    payload = json.dumps(body).encode() if body is not None else None
+    conn.request(method, path, body=payload, headers={'Content-Type': 'application/json'})
+    response = conn.getresponse()
+    return response.status, response.read()
+
+
+def wait_ready(port: int, timeout: float = 900) -> float:
+    """Poll /readyz until the server answers 200; returns the seconds waited"""
+    started = time.time()
+    while time.time() - started < timeout:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            status, _ = _request(conn, 'GET', '/readyz')
+            conn.close()
+            if status == 200:
+                return time.time() - started
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"Server on port {port} not ready after {timeout}s")
+
+
+def _client(args) -> dict:
+    """One client process: send predictions back to back until the deadline"""
+    port, policy_date, deadline, offset = args
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    latencies, errors, i = [], 0, offset
+    while time.time() < deadline:
+        body = {'policy_date': policy_date, 'policy_type': 'Both', 'states': [],
+                'compliance_level': 0.8, 'forecast_days': FORECAST_DAYS[i % len(FORECAST_DAYS)]}
+        i += 1
+        started = time.perf_counter()
+        try:
+            status, _ = _request(conn, 'POST', '/api/predict', body)
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+            status = None
+        if status == 200:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors += 1
+    conn.close()
+    return {'latencies': latencies, 'errors': errors}
+
+
+def server_memory_mb(pid: int) -> dict:
+    """Summed RSS and PSS (shared pages split between processes) of the server and its workers"""
+    pids = [pid]
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            pids += [int(child) for child in f.read().split()]
+        rss = pss = 0
+        for p in pids:
+            with open(f'/proc/{p}/smaps_rollup') as f:
+                fields = dict(line.split(':', 1) for line in f if ':' in line)
+            rss += int(fields['Rss'].split()[0])
+            pss += int(fields['Pss'].split()[0])
+    except (OSError, KeyError):
+        return {}
+    return {'processes': len(pids), 'rss_mb': rss / 1024, 'pss_mb': pss / 1024}
+
+
+def run_load_test(workers: int, threads: int, clients: int, seconds: float, port: int) -> dict:
+    """Start a server with `workers` workers, warm each worker, then load it for `seconds`"""
+    server = subprocess.Popen([sys.executable, 'production_server.py', '--host', '127.0.0.1',
+                               '--port', str(port), '--workers', str(workers), '--threads', str(threads)],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        ready = wait_ready(port)
+        policy_date = datetime.now().strftime('%Y-%m-%d')
+        with Pool(clients) as pool:
+            # Short warm pass so every worker has served the scenario once
+            pool.map(_client, [(port, policy_date, time.time() + 2, i) for i in range(clients)])
+            started = time.time()
+            runs = pool.map(_client, [(port, policy_date, started + seconds, i) for i in range(clients)])
+            elapsed = time.time() - started
+        memory = server_memory_mb(server.pid)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+    latencies = np.concatenate([run['latencies'] for run in runs]) if runs else np.array([])
+    return {
+        'workers': workers,
+        'threads': threads,
+        'ready_seconds': ready,
+        'requests': len(latencies),
+        'errors': sum(run['errors'] for run in runs),
+        'throughput': len(latencies) / elapsed,
+        'p50_ms': float(np.percentile(latencies, 50) * 1000) if len(latencies) else None,
+        'p95_ms': float(np.percentile(latencies, 95) * 1000) if len(latencies) else None,
+        **memory
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the production server at several worker counts")
+    parser.add_argument('--workers', default='1,2,4', help="Comma-separated worker counts")
+    parser.add_argument('--threads', type=int, default=4, help="Request threads per worker")
+    parser.add_argument('--clients', type=int, default=8, help="Concurrent client processes")
+    parser.add_argument('--seconds', type=float, default=15, help="Measured load duration per run")
+    parser.add_argument('--port', type=int, default=5055)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("WEB SERVER LOAD TEST")
+    print("=" * 80)
+    print(f"{args.clients} clients posting /api/predict for {args.seconds:.0f}s per run, "
+          f"{args.threads} threads per worker, {os.cpu_count()} cores")
+
+    results = []
+    for workers in [int(w) for w in args.workers.split(',')]:
+        print(f"\nStarting server with {workers} workers...")
+        result = run_load_test(workers, args.threads, args.clients, args.seconds, args.port)
+        results.append(result)
+        print(f"  Ready after {result['ready_seconds']:.1f}s, {result['requests']} requests, "
+              f"{result['errors']} errors")
+
+    base = results[0]['throughput'] or 1
+    print("\n" + "=" * 80)
+    print(f"{'Workers':>7} {'Req/s':>9} {'Scaling':>8} {'p50 ms':>9} {'p95 ms':>9} {'RSS MB':>9} {'PSS MB':>9}")
+    for r in results:
+        print(f"{r['workers']:>7} {r['throughput']:>9.1f} {r['throughput'] / base:>7.2f}x "
+              f"{r['p50_ms'] or 0:>9.1f} {r['p95_ms'] or 0:>9.1f} "
+              f"{r.get('rss_mb', float('nan')):>9.0f} {r.get('pss_mb', float('nan')):>9.0f}")
+    print("\nRSS counts shared pages in every process; PSS splits them between the processes,")
+    print("so PSS well below RSS shows the workers sharing the parent's data and models.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+"""
+Hyperparameter Tuning Module
+Time-budgeted successive-halving search over the gradient boosting
+hyperparameters, scored on time-ordered folds across a process pool
+"""
+
+import argparse
+import itertools
+import os
+import random
+import time
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.metrics import mean_absolute_error
+from typing import Dict, List
+import warnings
+warnings.filterwarnings('ignore')
+
+import backtesting
+from backtesting import FeatureCache, fold_windows, fold_arrays, MODEL_CLASSES
+from baseline_model import BaselineModel
+from policy_impact_model import PolicyImpactModel
+from model_registry import ModelRegistry
+
+DEFAULT_SPACE = {
+    'n_estimators': [50, 100, 150, 200, 300],
+    'learning_rate': [0.03, 0.05, 0.1, 0.2],
+    'max_depth': [3, 4, 5, 6, 8],
+    'subsample': [0.7, 0.85, 1.0],
+    'min_samples_leaf': [1, 3, 5]
+}
+
+CLASS_PARAMS = {'baseline': BaselineModel.MODEL_PARAMS, 'policy_impact': PolicyImpactModel.MODEL_PARAMS}
+
+
+def sample_candidates(space: Dict, n_candidates: int, seed: int = 42) -> List[Dict]:
+    """Draw distinct configurations from a grid-style parameter space"""
+    names = sorted(space)
+    grid = list(itertools.product(*(space[name] for name in names)))
+    rng = random.Random(seed)
+    picks = rng.sample(grid, min(n_candidates, len(grid)))
+    return [dict(zip(names, values)) for values in picks]
+
+
+def _evaluate(task: Dict) -> Dict:
+    """
+    Score one configuration on one fold
+
+    The score is the MAE divided by the mean actual value, averaged over the
+    enrolment and update targets, so both targets weigh equally.
+    """
+    start = time.perf_counter()
+    fold = fold_arrays(backtesting._worker_cache, task)
+    X_train, X_test = fold['X_train'], fold['X_test']
+
+    scores = []
+    for i in fold['target_idx']:
+        train_mask = X_train[:, i] > 0
+        test_mask = X_test[:, i] > 0
+        model = GradientBoostingRegressor(**task['params'])
+        model.fit(X_train[train_mask][:, fold['feature_idx']], X_train[train_mask, i])
+        y_true = X_test[test_mask, i]
+        y_pred = model.predict(X_test[test_mask][:, fold['feature_idx']])
+        scores.append(mean_absolute_error(y_true, y_pred) / max(y_true.mean(), 1e-9))
+
+    return {
+        'candidate': task['candidate'],
+        'fold': task['fold'],
+        'score': float(np.mean(scores)),
+        'seconds': time.perf_counter() - start
+    }
+
+
+class SuccessiveHalvingTuner:
+    """
+    Successive halving over time-ordered folds within a wall-clock budget
+
+    Every rung scores the surviving configurations on more folds (the most
+    recent fold first) and keeps the best 1/eta of them. The current default
+    configuration always takes part, so the winner is never worse than it on
+    the folds evaluated. Once the budget runs out no new evaluations are
+    started and the best configuration of the deepest completed rung wins
+    (or the best of those scored so far if the first rung was cut short).
+    """
+
+    def __init__(self, master_data: pd.DataFrame, model_class: str = 'baseline',
+                 space: Dict = None, n_candidates: int = 27, eta: int = 3,
+                 budget_seconds: float = 300, n_folds: int = 3, horizon_days: int = 14,
+                 min_train_days: int = 60, policy_date: str = "2025-03-15",
+                 n_jobs: int = None, seed: int = 42, cache_dir: str = ".backtest_cache"):
+        if model_class not in MODEL_CLASSES:
+            raise ValueError(f"Unknown model class '{model_class}', expected one of {MODEL_CLASSES}")
+        self.master_data = master_data
+        self.model_class = model_class
+        self.space = space or DEFAULT_SPACE
+        self.n_candidates = n_candidates
+        self.eta = eta
+        self.budget_seconds = budget_seconds
+        self.n_folds = n_folds
+        self.horizon_days = horizon_days
+        self.min_train_days = min_train_days
+        self.n_jobs = n_jobs or os.cpu_count()
+        self.seed = seed
+        self.cache = FeatureCache(master_data, policy_date, cache_dir)
+
+    def _candidates(self) -> List[Dict]:
+        """Sampled configurations merged over the defaults, with the defaults first"""
+        defaults = CLASS_PARAMS[self.model_class]
+        candidates = [dict(defaults)]
+        for sampled in sample_candidates(self.space, self.n_candidates - 1, self.seed):
+            params = {**defaults, **sampled}
+            if params not in candidates:
+                candidates.append(params)
+        return candidates
+
+    def run(self) -> Dict:
+        """
+        Run the search
+
+        Returns:
+            Dictionary with the best parameters, their score, the default
+            configuration's score on the same folds, and per-rung statistics
+        """
+        start = time.perf_counter()
+        deadline = start + self.budget_seconds
+        prefix = self.cache.build()
+
+        # Most recent fold first: it is the closest to how the model will be used
+        folds = fold_windows(self.master_data['date'], n_folds=self.n_folds,
+                             horizon_days=self.horizon_days, min_train_days=self.min_train_days)[::-1]
+        candidates = self._candidates()
+        scores = {}  # (candidate, fold) -> score
+        survivors = list(range(len(candidates)))
+        rungs = []
+        budget_exhausted = False
+
+        print(f"Tuning {self.model_class}: {len(candidates)} candidates, eta={self.eta}, "
+              f"{len(folds)} folds, budget {self.budget_seconds:.0f}s")
+
+        with ProcessPoolExecutor(max_workers=self.n_jobs, initializer=backtesting._init_worker,
+                                 initargs=(prefix,)) as pool:
+            rung = 0
+            while True:
+                n_rung_folds = min(len(folds), self.eta ** rung)
+                pending = [
+                    {**fold, 'model_class': self.model_class, 'candidate': c, 'params': candidates[c]}
+                    for c in survivors
+                    for fold in folds[:n_rung_folds]
+                    if (c, fold['fold']) not in scores
+                ]
+
+                # Keep at most n_jobs evaluations in flight so the budget can stop new ones
+                in_flight = set()
+                while pending or in_flight:
+                    while pending and len(in_flight) < self.n_jobs and time.perf_counter() < deadline:
+                        in_flight.add(pool.submit(_evaluate, pending.pop(0)))
+                    if not in_flight:
+                        break
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        result = future.result()
+                        scores[(result['candidate'], result['fold'])] = result['score']
+
+                rung_folds = [fold['fold'] for fold in folds[:n_rung_folds]]
+                complete = [c for c in survivors if all((c, f) in scores for f in rung_folds)]
+                if pending or len(complete) < len(survivors):
+                    budget_exhausted = True
+                    if rungs or not complete:
+                        break
+                    # First rung cut short: rank whatever was scored in time
+                    survivors = complete
+
+                ranked = sorted(complete, key=lambda c: np.mean([scores[(c, f)] for f in rung_folds]))
+                rungs.append({'rung': rung, 'folds': n_rung_folds, 'candidates': len(complete),
+                              'best_score': float(np.mean([scores[(ranked[0], f)] for f in rung_folds])),
+                              'elapsed': round(time.perf_counter() - start, 1)})
+                print(f"  Rung {rung}: {len(complete)} candidates on {n_rung_folds} fold(s), "
+                      f"best score {rungs[-1]['best_score']:.4f}")
+
+                if budget_exhausted or len(ranked) == 1 or (n_rung_folds == len(folds) and len(ranked) <= self.eta):
+                    survivors = ranked[:1]
+                    break
+                survivors = ranked[:max(1, len(ranked) // self.eta)]
+                rung += 1
+
+        if not rungs:
+            raise RuntimeError(f"Budget of {self.budget_seconds}s too small to score a single configuration")
+
+        # Winner: best survivor on the folds of the deepest completed rung
+        final_folds = [fold['fold'] for fold in folds[:rungs[-1]['folds']]]
+        scored = [c for c in survivors if all((c, f) in scores for f in final_folds)]
+        best = min(scored, key=lambda c: np.mean([scores[(c, f)] for f in final_folds]))
+        default_folds = [f for f in final_folds if (0, f) in scores]
+
+        return {
+            'model_class': self.model_class,
+            'best_params': candidates[best],
+            'best_score': float(np.mean([scores[(best, f)] for f in final_folds])),
+            'default_score': float(np.mean([scores[(0, f)] for f in default_folds])) if default_folds else None,
+            'folds_evaluated': len(final_folds),
+            'evaluations': len(scores),
+            'rungs': rungs,
+            'budget_seconds': self.budget_seconds,
+            'budget_exhausted': budget_exhausted,
+            'elapsed_seconds': round(time.perf_counter() - start, 1)
+        }
+
+
+def record_winner(result: Dict, registry: ModelRegistry = None) -> Dict:
+    """Write the winning configuration into the model registry"""
+    registry = registry or ModelRegistry()
+    tuning = {key: value for key, value in result.items() if key not in ('model_class', 'best_params')}
+    return registry.record(result['model_class'], 'tuned', tuned_params=result['best_params'], tuning=tuning)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Successive-halving hyperparameter search")
+    parser.add_argument('--model-class', choices=MODEL_CLASSES + ['both'], default='both')
+    parser.add_argument('--budget', type=float, default=600,
+                        help="Wall-clock budget in seconds (split across model classes)")
+    parser.add_argument('--candidates', type=int, default=27)
+    parser.add_argument('--eta', type=int, default=3, help="Keep the best 1/eta per rung")
+    parser.add_argument('--folds', type=int, default=3)
+    parser.add_argument('--horizon', type=int, default=14, help="Validation window per fold (days)")
+    parser.add_argument('--policy-date', default="2025-03-15", help="Policy date for the impact model features")
+    parser.add_argument('--jobs', type=int, help="Worker processes (default: all cores)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--dry-run', action='store_true', help="Do not write the winner to the registry")
+    args = parser.parse_args()
+
+    master_data = pd.read_csv("master_aadhaar_data.csv")
+    model_classes = MODEL_CLASSES if args.model_class == 'both' else [args.model_class]
+
+    for model_class in model_classes:
+        tuner = SuccessiveHalvingTuner(
+            master_data, model_class=model_class, n_candidates=args.candidates, eta=args.eta,
+            budget_seconds=args.budget / len(model_classes), n_folds=args.folds,
+            horizon_days=args.horizon, policy_date=args.policy_date, n_jobs=args.jobs, seed=args.seed
+        )
+        result = tuner.run()
+
+        print("\n" + "=" * 60)
+        print(f"BEST CONFIGURATION: {model_class}")
+        print("=" * 60)
+        for name, value in result['best_params'].items():
+            print(f"  {name}: {value}")
+        print(f"Score (relative MAE): {result['best_score']:.4f}"
+              + (f"  (defaults: {result['default_score']:.4f})" if result['default_score'] is not None else ""))
+        print(f"{result['evaluations']} evaluations in {result['elapsed_seconds']}s"
+              + (" - budget exhausted" if result['budget_exhausted'] else ""))
+
+        if not args.dry_run:
+            record_winner(result)
+            print("Winner written to the model registry (used on the next full fit)")
+
+
+if __name__ == "__main__":
+    main()
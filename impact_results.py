@@ -0,0 +1,236 @@
+"""
+Impact Results Module
+Single-pass aggregation of per-(date, state) impact predictions into
+compact, array-backed result objects
+"""
+
+import pandas as pd
+import numpy as np
+from collections.abc import Mapping
+from typing import Dict, Optional, Tuple
+
+IMPACT_COLUMNS = ['enrolment_impact', 'update_impact', 'total_impact']
+
+
+class ImpactColumn(Mapping):
+    """Read-only state -> impact view of one column of a RegionalImpact"""
+
+    __slots__ = ('_index', '_states', '_values')
+
+    def __init__(self, states: np.ndarray, index: Dict[str, int], values: np.ndarray):
+        self._states = states
+        self._index = index
+        self._values = values
+
+    def __getitem__(self, state: str) -> float:
+        return float(self._values[self._index[state]])
+
+    def __iter__(self):
+        return iter(self._states)
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
+class RegionalImpact(Mapping):
+    """
+    Per-state impact sums, ordered by total impact (largest first)
+
+    Reads like the nested dict of DataFrame.to_dict(): regional['total_impact']
+    maps state -> value and supports [state], .keys(), .values() and .items().
+    The sums themselves are held in one (states, 3) array.
+    """
+
+    __slots__ = ('states', 'sums', '_index')
+
+    def __init__(self, states: np.ndarray, sums: np.ndarray):
+        self.states = np.asarray(states, dtype=object)
+        self.sums = np.asarray(sums, dtype=np.float64)
+        self._index = {state: i for i, state in enumerate(self.states)}
+
+    def __getitem__(self, column: str) -> ImpactColumn:
+        if column not in IMPACT_COLUMNS:
+            raise KeyError(column)
+        return ImpactColumn(self.states, self._index, self.sums[:, IMPACT_COLUMNS.index(column)])
+
+    def __iter__(self):
+        return iter(IMPACT_COLUMNS)
+
+    def __len__(self) -> int:
+        return len(IMPACT_COLUMNS)
+
+    def __repr__(self) -> str:
+        return f"RegionalImpact({len(self.states)} states)"
+
+    @property
+    def nbytes(self) -> int:
+        return self.sums.nbytes + 64 * len(self.states)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Per-state sums as a DataFrame indexed by state"""
+        return pd.DataFrame(self.sums, index=pd.Index(self.states, name='state'), columns=IMPACT_COLUMNS)
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        """Nested {column: {state: value}} dicts"""
+        return {column: dict(self[column].items()) for column in IMPACT_COLUMNS}
+
+
+def impact_grid(dates: np.ndarray, states: np.ndarray, impacts: np.ndarray,
+                policy_date: str) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Sum the post-policy rows of a prediction frame into a (state, day) grid in one pass
+
+    Rows are coded by (state, day since the policy date) and each impact
+    column is accumulated with one bincount.
+
+    Args:
+        dates: Date of every row
+        states: State of every row
+        impacts: (rows, 3) enrolment, update and total impact per row
+        policy_date: Policy implementation date
+
+    Returns:
+        None when no row falls on or after the policy date, otherwise the
+        states, the (states, days, 3) grid, the day offsets that have rows
+        and the row mask of post-policy rows
+    """
+    policy_day = np.datetime64(pd.Timestamp(policy_date).date(), 'D')
+    day = (np.asarray(dates, dtype='datetime64[D]') - policy_day).astype(np.int64)
+    post = day >= 0
+    if not post.any():
+        return None
+
+    day = day[post]
+    codes, uniques = pd.factorize(np.asarray(states)[post])
+    n_states, n_days = len(uniques), int(day.max()) + 1
+    cell = codes * n_days + day
+    size = n_states * n_days
+
+    values = np.asarray(impacts, dtype=np.float64)[post]
+    grid = np.stack([np.bincount(cell, weights=values[:, k], minlength=size)
+                     for k in range(len(IMPACT_COLUMNS))], axis=-1).reshape(n_states, n_days, -1)
+    observed_days = np.flatnonzero(np.bincount(day, minlength=n_days))
+    return np.asarray(uniques, dtype=object), grid, observed_days, post
+
+
+class PolicyImpactResult(Mapping):
+    """
+    Compact result of one policy scenario
+
+    Reads like the results dict (result['summary'], result['regional_impact'],
+    result['daily_impact'], result['full_predictions']) but stores only the
+    summary and arrays: the per-state sums, the per-day sums and the
+    (state, day) impact grid. The daily and full prediction frames are built
+    on access; feature_frame() re-runs the models for the frame with every
+    engineered feature column.
+    """
+
+    KEYS = ('summary', 'regional_impact', 'daily_impact', 'full_predictions')
+
+    __slots__ = ('summary', 'regional_impact', 'observed_days', 'daily', 'states', 'grid', 'recursive')
+
+    def __init__(self, summary: Dict, regional_impact: RegionalImpact, observed_days: np.ndarray,
+                 daily: np.ndarray, states: np.ndarray, grid: np.ndarray, recursive: bool = False):
+        self.summary = summary
+        self.regional_impact = regional_impact
+        self.observed_days = observed_days
+        self.daily = daily
+        self.states = states
+        self.grid = grid
+        self.recursive = recursive
+
+    @classmethod
+    def from_predictions(cls, predictions: pd.DataFrame, policy_date: str, forecast_days: int,
+                         recursive: bool = False) -> Optional['PolicyImpactResult']:
+        """Aggregate a per-(date, state) prediction frame, or None without post-policy rows"""
+        aggregated = impact_grid(predictions['date'].values, predictions['state'].values,
+                                 predictions[IMPACT_COLUMNS].values, policy_date)
+        if aggregated is None:
+            return None
+        states, grid, observed_days, _ = aggregated
+        return cls.from_grid(policy_date, forecast_days, states, grid, observed_days, recursive)
+
+    @classmethod
+    def from_grid(cls, policy_date: str, forecast_days: int, states: np.ndarray, grid: np.ndarray,
+                  observed_days: np.ndarray, recursive: bool = False) -> 'PolicyImpactResult':
+        """Totals, per-state and per-day sums, peak and duration of a (state, day) impact grid"""
+        regional = grid.sum(axis=1)
+        order = np.argsort(-regional[:, 2], kind='stable')
+        daily = grid.sum(axis=0)[observed_days]
+        daily_total = daily[:, 2]
+        total_enrolment_impact, total_update_impact, _ = regional.sum(axis=0)
+        peak = int(np.argmax(daily_total))
+        policy_dt = pd.Timestamp(policy_date)
+
+        summary = {
+            'policy_date': policy_date,
+            'forecast_days': forecast_days,
+            'total_people_affected': int(total_enrolment_impact + total_update_impact),
+            'total_enrolment_increase': int(total_enrolment_impact),
+            'total_update_increase': int(total_update_impact),
+            'peak_impact_date': (policy_dt + pd.Timedelta(days=int(observed_days[peak]))).strftime('%Y-%m-%d'),
+            'peak_impact_volume': int(daily_total[peak]),
+            'significant_impact_duration_days': int((daily_total > daily_total.mean()).sum())
+        }
+        return cls(summary, RegionalImpact(states[order], regional[order]), observed_days, daily,
+                   states, grid, recursive)
+
+    def head(self, forecast_days: int, end_date) -> 'PolicyImpactResult':
+        """The result of a shorter forecast period ending on `end_date` (forecasts are causal)"""
+        end_day = (pd.Timestamp(end_date) - pd.Timestamp(self.summary['policy_date'])).days
+        return self.from_grid(self.summary['policy_date'], forecast_days, self.states,
+                              self.grid[:, :end_day + 1], self.observed_days[self.observed_days <= end_day],
+                              self.recursive)
+
+    def __getitem__(self, key: str):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self) -> int:
+        return len(self.KEYS)
+
+    def __repr__(self) -> str:
+        return f"PolicyImpactResult({self.summary['policy_date']}, {self.summary['forecast_days']} days)"
+
+    def _dates(self) -> pd.DatetimeIndex:
+        return pd.Timestamp(self.summary['policy_date']) + pd.to_timedelta(self.observed_days, unit='D')
+
+    @property
+    def daily_impact(self) -> pd.DataFrame:
+        """Impact per post-policy day"""
+        daily_impact = pd.DataFrame(self.daily, columns=IMPACT_COLUMNS)
+        daily_impact.insert(0, 'date', self._dates())
+        return daily_impact
+
+    @property
+    def full_predictions(self) -> pd.DataFrame:
+        """Impact per post-policy (date, state), date-major"""
+        cells = self.grid[:, self.observed_days].transpose(1, 0, 2).reshape(-1, len(IMPACT_COLUMNS))
+        frame = pd.DataFrame({
+            'date': np.repeat(self._dates().values, len(self.states)),
+            'state': np.tile(self.states, len(self.observed_days))
+        })
+        for k, col in enumerate(IMPACT_COLUMNS):
+            frame[col] = cells[:, k]
+        return frame
+
+    @property
+    def nbytes(self) -> int:
+        return (self.regional_impact.nbytes + self.observed_days.nbytes + self.daily.nbytes
+                + self.grid.nbytes + 64 * (len(self.states) + len(self.summary)))
+
+    def feature_frame(self, predictor) -> pd.DataFrame:
+        """
+        Full prediction frame with every engineered feature column
+
+        Not stored with the result: re-runs `predictor`'s models for this scenario.
+        """
+        return predictor._predict_frame(self.summary['policy_date'], self.summary['forecast_days'],
+                                        self.recursive)
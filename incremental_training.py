@@ -0,0 +1,132 @@
+"""
+Incremental Training Module
+Refreshes fitted tree ensembles on recent data: warm-start extra trees,
+or refit from scratch when the model has drifted or reached its tree cap
+"""
+
+import time
+import pandas as pd
+import numpy as np
+from sklearn.compose import TransformedTargetRegressor
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+from typing import Callable, Dict, Tuple
+
+
+def recent_window(df: pd.DataFrame, recent_days: int) -> pd.Series:
+    """Boolean mask of rows within the last `recent_days` days of the data"""
+    dates = pd.to_datetime(df['date'])
+    return dates > dates.max() - pd.Timedelta(days=recent_days)
+
+
+def rows_after(df: pd.DataFrame, trained_through: str) -> pd.Series:
+    """Boolean mask of rows dated after `trained_through` (None: no rows)"""
+    if trained_through is None:
+        return pd.Series(False, index=df.index)
+    return pd.to_datetime(df['date']) > pd.to_datetime(trained_through)
+
+
+def regression_metrics(y_true, y_pred) -> Dict:
+    """Holdout metrics of a single-target model, as recorded at training"""
+    return {
+        'mae': mean_absolute_error(y_true, y_pred),
+        'rmse': np.sqrt(mean_squared_error(y_true, y_pred)),
+        'r2': r2_score(y_true, y_pred)
+    }
+
+
+def reference_mae(metrics: Dict) -> float:
+    """Holdout MAE from training metrics ({'enrolment': {...}, 'update': {...}} or a single dict)"""
+    if not metrics:
+        return None
+    if 'mae' in metrics:
+        return metrics['mae']
+    return float(np.mean([m['mae'] for m in metrics.values()]))
+
+
+def warm_start_fit(model, X: pd.DataFrame, y, extra_estimators: int):
+    """Append `extra_estimators` trees to a fitted ensemble, trained on X, y"""
+    if isinstance(model, TransformedTargetRegressor):
+        # Refitting the wrapper would clone (and discard) the fitted forest
+        y = model.transformer_.transform(np.asarray(y))
+        estimator = model.regressor_
+    else:
+        estimator = model
+
+    estimator.set_params(warm_start=True, n_estimators=estimator.n_estimators + extra_estimators)
+    estimator.fit(X, y)
+    estimator.set_params(warm_start=False)
+    return estimator.n_estimators
+
+
+def refresh_estimator(model, X: pd.DataFrame, y, recent: pd.Series, new: pd.Series,
+                      make_model: Callable, reference: float = None, extra_estimators: int = 20,
+                      max_estimators: int = None, drift_threshold: float = 0.25,
+                      score: Callable = regression_metrics) -> Tuple[object, Dict]:
+    """
+    Refresh one fitted model with the latest rows
+
+    Drift is the relative increase of MAE on the `new` rows (those after the
+    last training, so out of sample) over the reference (holdout) MAE. Below
+    the threshold the ensemble is warm-started with extra trees fit on the
+    `recent` rows. Above it, or once the trees would exceed `max_estimators`,
+    a fresh model from `make_model` (the configured hyperparameters) is fit
+    on the full history like at training, and its holdout metrics (from
+    `score`) are reported as the new reference.
+
+    Returns:
+        (model, report) where report describes the action taken
+    """
+    start = time.perf_counter()
+    X_new, y_new = X[new.values], y[new.values]
+    X_recent, y_recent = X[recent.values], y[recent.values]
+
+    if len(X_new) == 0:
+        return model, {'action': 'skipped', 'reason': 'no rows since the last training'}
+
+    new_mae = mean_absolute_error(y_new, model.predict(X_new))
+
+    if reference is None:
+        # No holdout metrics available: compare against the preceding window
+        previous = X[~new.values].tail(len(X_new))
+        previous_y = y[~new.values].tail(len(X_new))
+        reference = mean_absolute_error(previous_y, model.predict(previous)) if len(previous) else new_mae
+
+    drift = new_mae / reference - 1 if reference > 0 else 0.0
+    capped = max_estimators is not None and _n_estimators(model) + extra_estimators > max_estimators
+
+    report = {}
+    if drift > drift_threshold or capped:
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        model = make_model()
+        model.fit(X_train, y_train)
+        report['metrics'] = score(y_test, model.predict(X_test))
+        action = 'refit'
+        reason = 'drift' if drift > drift_threshold else 'max_estimators'
+        rows = len(X_train)
+        n_estimators = _n_estimators(model)
+    else:
+        n_estimators = warm_start_fit(model, X_recent, y_recent, extra_estimators)
+        action = 'warm_start'
+        reason = None
+        rows = len(X_recent)
+
+    report.update({
+        'action': action,
+        'reason': reason,
+        'drift': float(drift),
+        'new_mae': float(new_mae),
+        'new_rows': int(len(X_new)),
+        'reference_mae': float(reference),
+        'rows': int(rows),
+        'n_estimators': int(n_estimators),
+        'seconds': round(time.perf_counter() - start, 3)
+    })
+    return model, report
+
+
+def _n_estimators(model) -> int:
+    """Number of trees of a (possibly wrapped) ensemble"""
+    if isinstance(model, TransformedTargetRegressor):
+        model = getattr(model, 'regressor_', model.regressor)
+    return model.n_estimators
@@ -0,0 +1,167 @@
+"""
+Job Queue Module
+Bounded pool of background workers that run prediction jobs, with
+status polling and queue positions
+"""
+
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Optional
+
+
+class QueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+
+class Job:
+    """One submitted scenario and its outcome"""
+
+    __slots__ = ('id', 'params', 'progress', 'status', 'submitted_at', 'started_at', 'finished_at',
+                 'result', 'error')
+
+    def __init__(self, params: Dict, progress: Callable[[Dict], None] = None):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.progress = progress
+        self.status = 'queued'
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+
+
+class JobQueue:
+    """
+    FIFO queue of jobs executed by `max_workers` background threads
+
+    Submitting returns immediately; clients poll status() for the queue
+    position and fetch the result once the job is done. At most `max_queued`
+    jobs wait at a time (submit raises QueueFull beyond that), and the last
+    `keep_finished` finished jobs are kept for polling. A job submitted with
+    a progress callback also pushes its events: the handler gets the
+    callback, and status changes arrive as {'event': 'job', 'status': ...}.
+    """
+
+    def __init__(self, handler: Callable[[Dict], Dict], max_workers: int = 2,
+                 max_queued: int = 100, keep_finished: int = 500):
+        self.handler = handler
+        self.max_workers = max(1, int(max_workers))
+        self.max_queued = max_queued
+        self.keep_finished = keep_finished
+        self._jobs = OrderedDict()  # id -> Job, in submission order
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._workers = []
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0}
+
+    def _start_workers(self):
+        """Start the worker threads on first use (condition held)"""
+        if self._workers:
+            return
+        for i in range(self.max_workers):
+            worker = threading.Thread(target=self._work, name=f"prediction-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, params: Dict, progress: Callable[[Dict], None] = None) -> Job:
+        """Queue a job and return it at once; `progress` receives its events (see the class docs)"""
+        with self._cond:
+            if len(self._queue) >= self.max_queued:
+                self.stats['rejected'] += 1
+                raise QueueFull(f"Job queue is full ({self.max_queued} jobs waiting)")
+            job = Job(params, progress)
+            self._jobs[job.id] = job
+            self._queue.append(job)
+            self.stats['submitted'] += 1
+            self._start_workers()
+            self._cond.notify()
+            position = len(self._queue)
+        self._notify(job, position=position)
+        return job
+
+    def _notify(self, job: Job, **fields):
+        """Send a job's current status to its progress callback, if any"""
+        if job.progress is not None:
+            job.progress({'event': 'job', 'job_id': job.id, 'status': job.status, **fields})
+
+    def _work(self):
+        """Worker loop: run queued jobs one at a time"""
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                job = self._queue.popleft()
+                job.status = 'running'
+                job.started_at = time.time()
+            self._notify(job)
+
+            try:
+                if job.progress is None:
+                    result = self.handler(job.params)
+                else:
+                    result = self.handler(job.params, progress=job.progress)
+                error, status = None, 'done'
+            except Exception as e:
+                traceback.print_exc()
+                result, error, status = None, str(e), 'failed'
+
+            with self._cond:
+                job.result, job.error, job.status = result, error, status
+                job.finished_at = time.time()
+                self.stats['completed' if status == 'done' else 'failed'] += 1
+                self._prune()
+            self._notify(job, **({'error': error} if error else {}))
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond keep_finished (condition held)"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in ('done', 'failed')]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        """Status of a job (with its 1-based queue position while queued), or None if unknown"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return self._describe(job)
+
+    def _describe(self, job: Job) -> Dict:
+        """Status fields of a job (condition held)"""
+        info = {
+            'job_id': job.id,
+            'status': job.status,
+            'submitted_at': job.submitted_at,
+            'started_at': job.started_at,
+            'finished_at': job.finished_at
+        }
+        if job.status == 'queued':
+            info['position'] = self._queue.index(job) + 1
+        if job.error:
+            info['error'] = job.error
+        return info
+
+    def pending(self) -> List[Dict]:
+        """Running jobs followed by queued jobs in queue order"""
+        with self._cond:
+            running = [job for job in self._jobs.values() if job.status == 'running']
+            return [self._describe(job) for job in running + list(self._queue)]
+
+    def summary(self) -> Dict:
+        """Queue length, workers and counters"""
+        with self._cond:
+            return {
+                'workers': self.max_workers,
+                'queued': len(self._queue),
+                'running': sum(job.status == 'running' for job in self._jobs.values()),
+                'max_queued': self.max_queued,
+                **self.stats
+            }
@@ -0,0 +1,75 @@
+"""
+Model Registry Module
+Tracks trained models, their metadata and every retrain action in a JSON file
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Dict
+
+
+class ModelRegistry:
+    """JSON-backed registry of model metadata and retrain history"""
+
+    def __init__(self, path: str = "model_registry.json"):
+        self.path = path
+        self.entries = self._read()
+
+    def _read(self) -> Dict:
+        """Read registry entries from disk (empty registry if missing)"""
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path) as f:
+            return json.load(f)
+
+    def reload(self):
+        """Re-read the registry in case another process updated it"""
+        self.entries = self._read()
+
+    def get(self, name: str) -> Dict:
+        """Current metadata for a model (empty dict if never registered)"""
+        return self.entries.get(name, {})
+
+    def version(self, name: str) -> int:
+        """Version counter of a model, bumped on every recorded action"""
+        return self.get(name).get('version', 0)
+
+    def record(self, name: str, action: str, **metadata) -> Dict:
+        """
+        Record a training action for a model
+
+        Top-level keys of the entry are updated with the given metadata and the
+        action is appended to the entry's history.
+        """
+        entry = self.entries.setdefault(name, {'version': 0, 'history': []})
+        entry['version'] += 1
+
+        event = {
+            'version': entry['version'],
+            'action': action,
+            'timestamp': datetime.now().isoformat(timespec='seconds')
+        }
+        event.update(metadata)
+
+        entry.update(metadata)
+        entry['last_action'] = action
+        entry['updated_at'] = event['timestamp']
+        entry['history'].append(event)
+
+        self.save()
+        return event
+
+    def save(self):
+        """Write the registry atomically"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f, indent=2, default=_to_json)
+        os.replace(tmp_path, self.path)
+
+
+def _to_json(value):
+    """Convert numpy scalars and other non-JSON values in metadata"""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
@@ -0,0 +1,55 @@
+"""
+Multi-Output Model Module
+Shared helpers for models that predict enrolments and updates jointly
+"""
+
+import pandas as pd
+import numpy as np
+from sklearn.ensemble import ExtraTreesRegressor
+from sklearn.compose import TransformedTargetRegressor
+from sklearn.preprocessing import StandardScaler
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from typing import Dict
+
+# Column order of the stacked target matrix (and of the joint prediction output)
+JOINT_TARGETS = ['total_enrolments', 'total_updates']
+
+
+def make_joint_regressor(n_estimators: int = 100, max_depth: int = None,
+                         min_samples_leaf: int = 1, n_jobs: int = 1) -> TransformedTargetRegressor:
+    """
+    Build one tree ensemble over the stacked targets
+
+    Extra-trees are natively multi-output, so every leaf stores both targets
+    and a single traversal scores enrolments and updates together.
+    Targets are standardized first so that updates (~20x larger) do not
+    dominate the split criterion. Single-threaded by default: the models are
+    fit and scored inside process pools, which already use every core.
+    """
+    forest = ExtraTreesRegressor(
+        n_estimators=n_estimators,
+        max_depth=max_depth,
+        min_samples_leaf=min_samples_leaf,
+        n_jobs=n_jobs,
+        random_state=42
+    )
+    return TransformedTargetRegressor(regressor=forest, transformer=StandardScaler())
+
+
+def joint_target_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Stacked target matrix restricted to rows where both targets have data"""
+    y = df[JOINT_TARGETS]
+    return y[(y > 0).all(axis=1)]
+
+
+def joint_metrics(y_true: pd.DataFrame, y_pred: np.ndarray) -> Dict:
+    """Per-target metrics for a joint prediction, keyed like the two-model setup"""
+    metrics = {}
+    for i, name in enumerate(['enrolment', 'update']):
+        truth = np.asarray(y_true)[:, i]
+        metrics[name] = {
+            'mae': mean_absolute_error(truth, y_pred[:, i]),
+            'rmse': np.sqrt(mean_squared_error(truth, y_pred[:, i])),
+            'r2': r2_score(truth, y_pred[:, i])
+        }
+    return metrics
@@ -154,7 +154,7 @@ print("\nNext Steps:")
 print("  - Review the generated visualizations")
 print(f"  - Read {report_filename} for detailed findings")
 print("  - Modify MY_POLICY_DATE and FORECAST_DAYS to test other scenarios")
-print("  - Compare multiple policy dates to find optimal timing")
+print("  - Find the best timing: python policy_date_optimizer.py --objective peak_load")
 
 print("\n" + "=" * 80)
 
@@ -169,8 +169,7 @@ print("\n" + "=" * 80)
 # print(f"Daily impact exported to: daily_impact_{MY_POLICY_DATE}.csv")
 
 # # Export regional impact
-# import pandas as pd
-# regional_df = pd.DataFrame(results['regional_impact'])
+# regional_df = results['regional_impact'].to_frame()
 # regional_df.to_csv(f'regional_impact_{MY_POLICY_DATE}.csv')
 # print(f"Regional impact exported to: regional_impact_{MY_POLICY_DATE}.csv")
 
@@ -0,0 +1,228 @@
+"""
+Policy Date Optimizer Module
+Searches a range of candidate policy dates for the best implementation
+timing under a chosen objective
+"""
+
+import argparse
+import contextlib
+import os
+import time
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List
+import warnings
+warnings.filterwarnings('ignore')
+
+from result_cache import ResultCache
+
+# Objective name -> (direction, description)
+OBJECTIVES = {
+    'peak_load': ('min', "Peak daily volume of additional enrolments and updates"),
+    'state_strain': ('min', "Largest additional load on one state, relative to its normal daily volume"),
+    'enrolment_uplift': ('max', "Total additional enrolments")
+}
+
+# Per-process predictor, loaded once by the pool initializer
+_worker = {}
+
+
+def _init_worker():
+    """Load data and models once per worker process"""
+    from prediction_system import PolicyImpactPredictor
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        predictor = PolicyImpactPredictor(result_cache=ResultCache(max_bytes=0))
+        predictor.load_and_prepare_data()
+        predictor.load_models()
+    _worker['predictor'] = predictor
+
+    data = predictor.master_data
+    _worker['state_volume'] = (data['total_enrolments'] + data['total_updates']).groupby(data['state']).mean()
+
+
+def _score_chunk(task: Dict) -> Dict[str, Dict]:
+    """Score a block of policy dates in one batched pass and reduce each to its objectives"""
+    predictor = _worker['predictor']
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        results = predictor.predict_policy_impacts(task['dates'], task['forecast_days'], use_cache=False)
+
+    scored = {}
+    for policy_date, result in results.items():
+        if 'summary' not in result:
+            continue
+        summary = result['summary']
+        post_days = max(len(result['daily_impact']), 1)
+        regional = pd.Series(result['regional_impact']['total_impact'])
+        strain = regional / (_worker['state_volume'].reindex(regional.index) * post_days)
+        strain = strain.replace([np.inf, -np.inf], np.nan).dropna()
+        scored[policy_date] = {
+            'summary': summary,
+            'scores': {
+                'peak_load': float(summary['peak_impact_volume']),
+                'state_strain': float(strain.max()) if len(strain) else 0.0,
+                'enrolment_uplift': float(summary['total_enrolment_increase'])
+            },
+            'most_strained_state': strain.idxmax() if len(strain) else None
+        }
+    return scored
+
+
+class _DateScorer:
+    """Scores batches of policy dates, in this process or across a worker pool"""
+
+    def __init__(self, forecast_days: int, n_jobs: int):
+        self.forecast_days = forecast_days
+        self.n_jobs = n_jobs
+        self.pool = None
+        if n_jobs > 1:
+            self.pool = ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker)
+        else:
+            _init_worker()
+
+    def score(self, dates: List[str]) -> Dict[str, Dict]:
+        """Objective scores of `dates`, one batched chunk per worker"""
+        if not dates:
+            return {}
+        chunks = [[str(date) for date in chunk]
+                  for chunk in np.array_split(dates, min(len(dates), self.n_jobs)) if len(chunk)]
+        tasks = [{'dates': chunk, 'forecast_days': self.forecast_days} for chunk in chunks]
+        scored = {}
+        for out in (self.pool.map(_score_chunk, tasks) if self.pool else map(_score_chunk, tasks)):
+            scored.update(out)
+        return scored
+
+    def close(self):
+        if self.pool:
+            self.pool.shutdown()
+
+
+def optimize_policy_date(start: str = None, end: str = None, objective: str = 'peak_load',
+                         forecast_days: int = 60, coarse_step: int = 7, refine_top: int = 3,
+                         top_n: int = 10, n_jobs: int = None) -> Dict:
+    """
+    Find the policy date in [start, end] that optimizes `objective`
+
+    Every `coarse_step`-th date is scored first; the neighbourhoods of the
+    `refine_top` best coarse dates are then scored day by day. Dates are
+    scored with the saved models through the batched scenario API
+    (PolicyImpactPredictor.predict_policy_impacts), split across worker
+    processes.
+
+    Args:
+        start: First candidate date (default: today)
+        end: Last candidate date (default: start + 365 days)
+        objective: One of OBJECTIVES
+        forecast_days: Forecast period scored for every candidate
+        coarse_step: Spacing of the coarse pass in days (1 scores every date)
+        refine_top: Coarse dates whose neighbourhoods are refined
+        top_n: Number of ranked dates returned
+        n_jobs: Worker processes (default: all cores)
+
+    Returns:
+        Dictionary with the ranked dates, their summaries and search statistics
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective '{objective}'. Choose from: {', '.join(OBJECTIVES)}")
+    direction, description = OBJECTIVES[objective]
+
+    start_dt = pd.to_datetime(start or datetime.now().date())
+    end_dt = pd.to_datetime(end) if end else start_dt + timedelta(days=365)
+    if end_dt < start_dt:
+        raise ValueError("end must not be before start")
+    candidates = [str(d.date()) for d in pd.date_range(start_dt, end_dt, freq='D')]
+    coarse_step = max(1, int(coarse_step))
+    n_jobs = max(1, n_jobs or os.cpu_count())
+
+    print(f"Optimizing policy date for '{objective}' ({description})")
+    print(f"Candidates: {candidates[0]} to {candidates[-1]} ({len(candidates)} dates), "
+          f"forecast {forecast_days} days, {n_jobs} workers")
+
+    started = time.perf_counter()
+    sign = 1 if direction == 'min' else -1
+
+    def ranked(scored: Dict[str, Dict]) -> List[str]:
+        return sorted(scored, key=lambda date: (sign * scored[date]['scores'][objective], date))
+
+    scorer = _DateScorer(forecast_days, n_jobs)
+    try:
+        coarse = candidates[::coarse_step]
+        if coarse[-1] != candidates[-1]:
+            coarse.append(candidates[-1])
+        scored = scorer.score(coarse)
+        print(f"  Coarse pass: {len(coarse)} dates every {coarse_step} days")
+
+        refine = set()
+        for date in ranked(scored)[:refine_top]:
+            i = candidates.index(date)
+            refine.update(candidates[max(0, i - coarse_step + 1):i + coarse_step])
+        refine = sorted(refine - set(scored))
+        scored.update(scorer.score(refine))
+        print(f"  Refinement: {len(refine)} dates around the best {refine_top} coarse dates")
+    finally:
+        scorer.close()
+
+    if not scored:
+        raise ValueError("No candidate date produced a post-policy forecast")
+
+    ranking = [{
+        'rank': rank,
+        'policy_date': date,
+        'score': scored[date]['scores'][objective],
+        'scores': scored[date]['scores'],
+        'most_strained_state': scored[date]['most_strained_state'],
+        'summary': scored[date]['summary']
+    } for rank, date in enumerate(ranked(scored)[:top_n], 1)]
+
+    seconds = time.perf_counter() - started
+    print(f"Scored {len(scored)} of {len(candidates)} dates in {seconds:.1f}s")
+    return {
+        'objective': objective,
+        'direction': direction,
+        'forecast_days': forecast_days,
+        'start': candidates[0],
+        'end': candidates[-1],
+        'dates_evaluated': len(scored),
+        'seconds': round(seconds, 2),
+        'best': ranking[0],
+        'ranking': ranking
+    }
+
+
+def print_ranking(result: Dict):
+    """Print the ranked dates of an optimization result"""
+    print("\n" + "=" * 80)
+    print(f"BEST POLICY DATES ({result['objective']}, {result['direction']}imize)")
+    print("=" * 80)
+    print(f"{'Rank':>4}  {'Policy Date':<12} {'Score':>14} {'Peak Daily':>12} "
+          f"{'Enrolments':>12} {'People':>12}  Most Strained State")
+    for row in result['ranking']:
+        summary = row['summary']
+        print(f"{row['rank']:>4}  {row['policy_date']:<12} {row['score']:>14,.3f} "
+              f"{summary['peak_impact_volume']:>12,} {summary['total_enrolment_increase']:>12,} "
+              f"{summary['total_people_affected']:>12,}  {row['most_strained_state']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search a date range for the best policy implementation date")
+    parser.add_argument('--start', help="First candidate date (default: today)")
+    parser.add_argument('--end', help="Last candidate date (default: start + 365 days)")
+    parser.add_argument('--objective', choices=list(OBJECTIVES), default='peak_load', help="What to optimize")
+    parser.add_argument('--forecast-days', type=int, default=60, help="Forecast period per candidate")
+    parser.add_argument('--coarse-step', type=int, default=7, help="Spacing of the coarse pass in days")
+    parser.add_argument('--refine-top', type=int, default=3, help="Coarse dates to refine around")
+    parser.add_argument('--top', type=int, default=10, help="Number of ranked dates to show")
+    parser.add_argument('--jobs', type=int, help="Worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    result = optimize_policy_date(start=args.start, end=args.end, objective=args.objective,
+                                  forecast_days=args.forecast_days, coarse_step=args.coarse_step,
+                                  refine_top=args.refine_top, top_n=args.top,
+                                  n_jobs=args.jobs)
+    print_ranking(result)
+
+
+if __name__ == "__main__":
+    main()
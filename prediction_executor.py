@@ -0,0 +1,176 @@
+"""
+Prediction Executor Module
+Process pool that runs the prediction and filter stages of web requests
+in workers with the master data and models preloaded
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterator, List
+
+from prediction_progress import ProgressCallback
+
+# Per-process state, set up once by the pool initializer
+_worker = {}
+
+
+def _init_worker(barrier, events):
+    """Load the master data and models and run one throwaway prediction in this worker"""
+    # Only the prediction stages: importing the web app would also start its
+    # executor, job queue and result store in every worker
+    import prediction_service
+
+    started = time.perf_counter()
+    predictor = prediction_service.create_predictor()
+    prediction_service.load_baseline_models(predictor)
+    loaded = time.perf_counter()
+    predictor.warm_up()
+    _worker.update({
+        'service': prediction_service,
+        'predictor': predictor,
+        'barrier': barrier,
+        'events': events,
+        'timings': {
+            'load_seconds': round(loaded - started, 3),
+            'warmup_prediction_seconds': round(time.perf_counter() - loaded, 3)
+        }
+    })
+
+
+def _run(params: Dict, token: str = None) -> Dict:
+    """Predict and filter one scenario in this worker, sending progress events tagged with `token`"""
+    if token is None:
+        return _worker['service'].predict_scenario(_worker['predictor'], params)
+    events = _worker['events']
+    try:
+        return _worker['service'].predict_scenario(_worker['predictor'], params,
+                                                   progress=lambda event: events.put((token, event)))
+    finally:
+        # Marks the end of this call's events
+        events.put((token, None))
+
+
+def _run_batch(indexed_params: List) -> List:
+    """Predict and filter a batch of (index, params) scenarios in this worker"""
+    return _worker['service'].predict_scenarios(_worker['predictor'], indexed_params)
+
+
+def _ready(timeout: float) -> Dict:
+    """Wait until every worker has initialized (one call per worker), then report this one"""
+    _worker['barrier'].wait(timeout)
+    return {'pid': os.getpid(), **_worker['timings']}
+
+
+class PredictionExecutor:
+    """
+    Runs predictions in `workers` processes that each hold their own predictor
+
+    Prediction is CPU-bound pandas and sklearn work that holds the GIL, so
+    request threads only send the scenario parameters to a worker and wait
+    for its JSON-ready response. Workers are started with 'spawn' (forking
+    a threaded web server is unsafe) and initialize once. A crashed worker
+    breaks the pool; it is then replaced on the next request. Progress
+    events of a call come back on a queue shared by the workers and are
+    handed to that call's callback by a listener thread.
+    """
+
+    def __init__(self, workers: int = None):
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self._lock = threading.Lock()
+        self._pool = None
+        self._barrier = None
+        self._events = None
+        self._listeners = {}  # token -> (progress callback, set once its events are delivered)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                context = multiprocessing.get_context('spawn')
+                self._barrier = context.Barrier(self.workers)
+                self._events = context.Queue()
+                threading.Thread(target=self._dispatch_events, args=(self._events,),
+                                 name="prediction-progress", daemon=True).start()
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                                 initializer=_init_worker,
+                                                 initargs=(self._barrier, self._events))
+            return self._pool
+
+    def _dispatch_events(self, events):
+        """Hand progress events from the workers to their callers' callbacks until the pool is dropped"""
+        while True:
+            item = events.get()
+            if item is None:
+                return
+            token, event = item
+            listener = self._listeners.get(token)
+            if listener is None:
+                continue
+            progress, delivered = listener
+            if event is None:
+                delivered.set()
+            else:
+                try:
+                    progress(event)
+                except Exception:
+                    pass
+
+    def run(self, params: Dict, progress: ProgressCallback = None) -> Dict:
+        """Predict one scenario in a worker process, passing its progress events to `progress`"""
+        pool = self._get_pool()
+        token = None
+        if progress is not None:
+            token = uuid.uuid4().hex
+            self._listeners[token] = (progress, threading.Event())
+        try:
+            result = pool.submit(_run, params, token).result()
+            if token is not None:
+                # Events travel separately from the result; let them arrive first
+                self._listeners[token][1].wait(timeout=5)
+            return result
+        except BrokenProcessPool:
+            self._reset(pool)
+            raise
+        finally:
+            self._listeners.pop(token, None)
+
+    def run_batches(self, batches: List[List]) -> Iterator[List]:
+        """Run each batch of (index, params) scenarios in a worker, yielding results as batches finish"""
+        pool = self._get_pool()
+        try:
+            for future in as_completed([pool.submit(_run_batch, batch) for batch in batches]):
+                yield future.result()
+        except BrokenProcessPool:
+            self._reset(pool)
+            raise
+
+    def warm_up(self, timeout: float = 1800) -> List[Dict]:
+        """Start every worker and wait until all have loaded and warmed up"""
+        pool = self._get_pool()
+        try:
+            return [future.result() for future in [pool.submit(_ready, timeout) for _ in range(self.workers)]]
+        except BrokenProcessPool:
+            self._reset(pool)
+            raise
+
+    def _reset(self, pool: ProcessPoolExecutor):
+        """Drop a broken pool so the next call starts a fresh one"""
+        with self._lock:
+            events = None
+            if self._pool is pool:
+                self._pool, events = None, self._events
+        pool.shutdown(wait=False, cancel_futures=True)
+        if events is not None:
+            events.put(None)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+            events = self._events
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+            events.put(None)
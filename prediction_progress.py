@@ -0,0 +1,34 @@
+"""
+Prediction Progress Module
+Stage and partial-result events reported while a prediction runs, so
+long predictions can stream their progress
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+# Receives event dicts: {'event': 'stage' | 'source' | 'partial', ...}
+ProgressCallback = Callable[[Dict], None]
+
+
+def report(progress: Optional[ProgressCallback], event: str, **fields):
+    """Send one event to `progress` (no-op without a callback)"""
+    if progress is not None:
+        progress({'event': event, **fields})
+
+
+@contextmanager
+def report_stage(progress: Optional[ProgressCallback], stage: str):
+    """Report `stage` as started, then as done (or failed, if it raised) with its duration"""
+    if progress is None:
+        yield
+        return
+    report(progress, 'stage', stage=stage, status='started')
+    started = time.perf_counter()
+    status = 'failed'
+    try:
+        yield
+        status = 'done'
+    finally:
+        report(progress, 'stage', stage=stage, status=status, seconds=round(time.perf_counter() - started, 3))
@@ -0,0 +1,353 @@
+"""
+Prediction Service Module
+Prediction and policy filter stages shared by the web app and its
+prediction worker processes (no side effects on import)
+"""
+
+import traceback
+import numpy as np
+import pandas as pd
+
+from prediction_system import PolicyImpactPredictor
+from result_cache import ResultCache
+from compliance_simulation import simulate_compliance
+from single_flight import SingleFlight
+from prediction_progress import report, report_stage
+
+# Coalesces concurrent requests for the same scenario into one computation
+scenario_flight = SingleFlight()
+
+
+def create_predictor():
+    """Create the predictor and load the master data"""
+    # sklearn models on the request path: the memory-mapped ensembles load faster
+    # but score a forecast grid 5-10x slower (benchmark_model_loading.py)
+    pred = PolicyImpactPredictor(result_cache=ResultCache(disk_dir=".result_cache"),
+                                 scenario_table="scenario_table")
+    pred.load_and_prepare_data(use_cached=True)
+    return pred
+
+
+def load_baseline_models(pred):
+    """Load the saved baseline models, training them if there are none"""
+    try:
+        pred.baseline_model.load_models()
+        print("Loaded existing baseline models")
+    except:
+        print("Training baseline models...")
+        pred.train_baseline()
+
+
+def predict_scenario(pred, params, progress=None):
+    """
+    Predict one scenario with `pred` and apply the policy filters
+    
+    Runs in the request thread or in a prediction worker process; takes and
+    returns only plain parameters and JSON-ready data. `progress` receives
+    stage events and the national totals ahead of the regional breakdown.
+    """
+    # Generate predictions with a policy model trained for this date
+    # (looked up in the scenario table when the date is precomputed).
+    # Identical concurrent scenarios share one computation; different
+    # ones run in parallel.
+    print(f"Generating predictions...")
+    key = tuple(params['scenario'])
+    results, shared = scenario_flight.do(key, lambda: pred.predict_for_policy_date(*key, progress=progress))
+    if shared:
+        print(f"Shared in-flight prediction for {key}")
+        report(progress, 'source', source='shared in-flight prediction')
+    
+    if progress is not None:
+        # National totals only need the summary, so they can be shown before the filters run
+        enrolments, updates = adjust_impacts(results['summary']['total_enrolment_increase'],
+                                             results['summary']['total_update_increase'],
+                                             params['policy_type'], params['compliance_level'])
+        report(progress, 'partial', part='national', total_people_affected=max(0, int(enrolments + updates)),
+               total_enrolments=max(0, int(enrolments)), total_updates=max(0, int(updates)))
+    
+    # Apply filters based on policy parameters
+    with report_stage(progress, 'filters'):
+        filtered_results = apply_policy_filters(
+            results, 
+            params['policy_type'], 
+            params['age_groups'], 
+            params['states'], 
+            params['compliance_level'],
+            params['forecast_days']
+        )
+    
+    return build_response(params, results, filtered_results)
+
+
+def build_response(params, results, filtered_results):
+    """Response fields of one scenario from its prediction and filtered results"""
+    # Prepare response
+    response = {
+        'policy_date': params['policy_date'],
+        'summary': {
+            'total_people_affected': int(filtered_results['total_affected']),
+            'total_enrolments': int(filtered_results['total_enrolments']),
+            'total_updates': int(filtered_results['total_updates']),
+            'peak_date': filtered_results['peak_date'],
+            'peak_volume': int(filtered_results['peak_volume']),
+            'duration_days': int(filtered_results['duration'])
+        },
+        'regional_impact': filtered_results['regional_data'],
+        'daily_impact': filtered_results['daily_data'],
+        'risk_assessment': filtered_results['risk_levels']
+    }
+    
+    # Optional P10/P50/P90 bands from Monte Carlo compliance scenarios
+    if params['simulate']:
+        response['uncertainty'] = simulate_policy_bands(
+            results, params['policy_type'], params['states'], params['compliance_level'],
+            n_simulations=params['simulations'],
+            seed=params['seed']
+        )
+    
+    return response
+
+
+def predict_scenarios(pred, indexed_params):
+    """
+    Predict a batch of scenarios with `pred`, sharing the work between them
+    
+    Policy dates are forecast together (predict_for_policy_dates: one
+    featurization and baseline pass, one policy model per date), and the
+    filters of all scenarios with the same prediction run as one vectorized
+    batch. Runs in the request thread or in a prediction worker process.
+    
+    Args:
+        indexed_params: (index, parsed parameters) pairs
+        
+    Returns:
+        (index, response fields) pairs, or (index, error message) for
+        scenarios whose prediction failed
+    """
+    groups = {}
+    for index, params in indexed_params:
+        groups.setdefault(tuple(params['scenario']), []).append((index, params))
+    
+    # Shared forecasts for the dates of all non-recursive scenarios
+    batched = [key for key in groups if not key[2]]
+    if batched:
+        try:
+            pred.predict_for_policy_dates([key[0] for key in batched], max(key[1] for key in batched))
+        except Exception:
+            # Fall back to per-date predictions below, which report errors per scenario
+            traceback.print_exc()
+    
+    computed = []
+    for key, members in groups.items():
+        try:
+            results = pred.predict_for_policy_date(*key)
+            filtered = apply_policy_filters_batch(results, [params for _, params in members])
+            computed += [(index, build_response(params, results, filtered_results))
+                         for (index, params), filtered_results in zip(members, filtered)]
+        except Exception as e:
+            traceback.print_exc()
+            computed += [(index, str(e)) for index, _ in members]
+    return computed
+
+
+def simulate_policy_bands(results, policy_type, states, compliance_level, n_simulations=10000, seed=None):
+    """
+    Monte Carlo compliance and uptake bands for the selected policy type and states
+    
+    Args:
+        n_simulations: Number of compliance/uptake scenarios drawn
+        seed: Random seed (same seed, same bands)
+    """
+    simulation = simulate_compliance(results, compliance_level=compliance_level,
+                                     n_simulations=n_simulations, seed=seed)
+    channel = {'Enrolment': 'enrolment', 'Update': 'update'}.get(policy_type, 'total')
+    columns = {f'{channel}_p{p}': f'p{p}' for p in (10, 50, 90)}
+    print(f"Simulated {n_simulations} compliance scenarios in {simulation['seconds']}s")
+    
+    daily = simulation['daily_impact'][['date'] + list(columns)].rename(columns=columns)
+    daily['date'] = daily['date'].dt.strftime('%Y-%m-%d')
+    
+    regional = simulation['regional_impact'][list(columns)].rename(columns=columns)
+    if states and 'All States' not in states:
+        regional = regional[regional.index.isin(states)]
+    
+    return {
+        'n_simulations': n_simulations,
+        'seed': seed,
+        'total': {band: simulation['total'][column] for column, band in columns.items()},
+        'daily': daily.round(1).to_dict('records'),
+        'regional': regional.round(1).reset_index().to_dict('records')
+    }
+
+
+# Official list of valid states (regional rows for anything else are dropped)
+VALID_STATES = [
+    'Andhra Pradesh', 'Arunachal Pradesh', 'Assam', 'Bihar', 'Chhattisgarh',
+    'Goa', 'Gujarat', 'Haryana', 'Himachal Pradesh', 'Jharkhand',
+    'Karnataka', 'Kerala', 'Madhya Pradesh', 'Maharashtra', 'Manipur',
+    'Meghalaya', 'Mizoram', 'Nagaland', 'Odisha', 'Punjab',
+    'Rajasthan', 'Sikkim', 'Tamil Nadu', 'Telangana', 'Tripura',
+    'Uttar Pradesh', 'Uttarakhand', 'West Bengal',
+    'Andaman and Nicobar Islands', 'Chandigarh',
+    'Dadra and Nagar Haveli and Daman and Diu', 'Delhi',
+    'Jammu and Kashmir', 'Ladakh', 'Lakshadweep', 'Puducherry'
+]
+
+
+def adjust_impacts(enrolments, updates, policy_type, compliance_factor):
+    """
+    Compliance-scaled enrolment and update impacts for a policy type (element-wise on arrays)
+    
+    Uses absolute values to prevent negatives. Where the model predicts 0
+    updates for a policy that includes updates, they are estimated as 50% of
+    the enrolments (historical data shows updates are ~22x enrolments, so
+    this is conservative). With arrays of policy types and compliance
+    factors (one per scenario), the result has one row per scenario.
+    """
+    policy_type = np.asarray(policy_type)
+    compliance_factor = np.asarray(compliance_factor, dtype=np.float64)
+    if policy_type.ndim:
+        # Scenarios along the first axis
+        policy_type = policy_type.reshape((-1,) + (1,) * np.ndim(enrolments))
+        compliance_factor = compliance_factor.reshape(policy_type.shape)
+    
+    enrolments = np.abs(np.asarray(enrolments, dtype=np.float64)) * compliance_factor
+    updates = np.abs(np.asarray(updates, dtype=np.float64)) * compliance_factor
+    updates = np.where(np.isin(policy_type, ['Both', 'Update']) & (updates == 0), enrolments * 0.5, updates)
+    
+    # For 'Both', keep both values
+    updates = np.where(policy_type == 'Enrolment', 0.0, updates)
+    enrolments = np.where(policy_type == 'Update', 0.0, enrolments)
+    return enrolments, updates
+
+
+def apply_policy_filters(results, policy_type, age_groups, states, compliance_level, forecast_days=60):
+    """
+    Apply policy-specific filters to results
+    
+    Args:
+        forecast_days: Number of days in forecast period (for duration calculation)
+    """
+    return apply_policy_filters_batch(results, [{
+        'policy_type': policy_type,
+        'age_groups': age_groups,
+        'states': states,
+        'compliance_level': compliance_level,
+        'forecast_days': forecast_days
+    }])[0]
+
+
+def apply_policy_filters_batch(results, scenarios):
+    """
+    Apply the policy filters of several scenarios to one prediction result
+    
+    The absolute value, compliance scaling, update fallback, policy-type
+    masking and risk banding run on (scenario x state) and (scenario x day)
+    arrays; rows are converted to JSON records only at the end.
+    
+    Args:
+        results: Prediction result shared by the scenarios
+        scenarios: Dicts with policy_type, states, compliance_level and forecast_days
+        
+    Returns:
+        One filtered result per scenario (see apply_policy_filters)
+    """
+    summary = results['summary']
+    regional = results['regional_impact']
+    regional = regional.to_frame() if hasattr(regional, 'to_frame') else pd.DataFrame(regional)
+    daily = results['daily_impact']
+    
+    policy_types = np.array([scenario['policy_type'] for scenario in scenarios], dtype=object)
+    compliance = np.array([scenario['compliance_level'] for scenario in scenarios], dtype=np.float64)
+    
+    # Filtered totals per scenario
+    total_enrolments, total_updates = adjust_impacts(
+        summary['total_enrolment_increase'], summary['total_update_increase'], policy_types, compliance
+    )
+    total_affected = total_enrolments + total_updates
+    
+    # Regional data - ONLY official states, and only each scenario's selected ones if any
+    state_names = regional.index.values
+    keep = np.tile(np.isin(state_names, VALID_STATES), (len(scenarios), 1))
+    for i, scenario in enumerate(scenarios):
+        states = scenario['states']
+        if states and 'All States' not in states:
+            keep[i] &= np.isin(state_names, states)
+    enrol_impact, update_impact = adjust_impacts(regional['enrolment_impact'].values,
+                                                 regional['update_impact'].values, policy_types, compliance)
+    total_impact = enrol_impact + update_impact
+    # States without impact are left out
+    keep &= total_impact > 0
+    
+    # Percentage increase over a mock baseline of 10,000, banded into risk levels
+    pct_increase = total_impact / 10000 * 100
+    risk_level = np.select([pct_increase > 50, pct_increase > 25], ['High', 'Medium'], 'Low')
+    enrol_int = enrol_impact.astype(np.int64)
+    update_int = update_impact.astype(np.int64)
+    total_int = total_impact.astype(np.int64)
+    
+    # Daily series
+    daily_enrol, daily_update = adjust_impacts(daily['enrolment_impact'].values, daily['update_impact'].values,
+                                               policy_types, compliance)
+    daily_enrol_int = daily_enrol.astype(np.int64)
+    daily_update_int = daily_update.astype(np.int64)
+    daily_total_int = (daily_enrol + daily_update).astype(np.int64)
+    daily_dates = pd.DatetimeIndex(daily['date']).strftime('%Y-%m-%d').tolist()
+    peaks = daily_total_int.argmax(axis=1) if len(daily_dates) else None
+    
+    filtered = []
+    for i, scenario in enumerate(scenarios):
+        # Sort by total impact
+        rows = np.flatnonzero(keep[i])
+        rows = rows[np.argsort(-total_int[i, rows], kind='stable')]
+        regional_data = [{
+            'state': state,
+            'predicted_enrolments': enrol,
+            'predicted_updates': update,
+            'total_impact': total,
+            'pct_increase': round(pct, 1),
+            'risk_level': risk
+        } for state, enrol, update, total, pct, risk in zip(
+            state_names[rows].tolist(), enrol_int[i, rows].tolist(), update_int[i, rows].tolist(),
+            total_int[i, rows].tolist(), pct_increase[i, rows].tolist(), risk_level[i, rows].tolist()
+        )]
+        
+        daily_data = [{
+            'date': date,
+            'enrolments': enrol,
+            'updates': update,
+            'total': total
+        } for date, enrol, update, total in zip(daily_dates, daily_enrol_int[i].tolist(),
+                                                daily_update_int[i].tolist(), daily_total_int[i].tolist())]
+        
+        # Find peak - ensure positive
+        if daily_dates:
+            peak_date = daily_dates[peaks[i]]
+            peak_volume = max(0, int(daily_total_int[i, peaks[i]]))
+        else:
+            peak_date = summary['policy_date']
+            peak_volume = 0
+        
+        # Calculate duration - FIXED: Should equal forecast period exactly
+        # Use the forecast_days parameter directly instead of counting filtered data
+        # This ensures duration always matches the user's selected forecast period
+        duration = scenario['forecast_days']
+        
+        # Risk assessment
+        risk_levels = {
+            f'{level.lower()}_risk_states': state_names[rows][risk_level[i, rows] == level].tolist()
+            for level in ('High', 'Medium', 'Low')
+        }
+        
+        filtered.append({
+            'total_affected': max(0, int(total_affected[i])),
+            'total_enrolments': max(0, int(total_enrolments[i])),
+            'total_updates': max(0, int(total_updates[i])),
+            'peak_date': peak_date,
+            'peak_volume': max(0, int(peak_volume)),
+            'duration': max(0, int(duration)),
+            'regional_data': regional_data,
+            'daily_data': daily_data,
+            'risk_levels': risk_levels
+        })
+    return filtered
@@ -3,10 +3,15 @@ Policy Impact Prediction System
 Main interface for predicting policy impacts
 """
 
+import copy
+import json
+import os
+import threading
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -14,14 +19,62 @@ from data_loader import AadhaarDataLoader
 from feature_engineering import FeatureEngineer
 from baseline_model import BaselineModel
 from policy_impact_model import PolicyImpactModel
+from model_registry import ModelRegistry
+from recursive_forecaster import RecursiveForecaster, HISTORY
+from result_cache import ResultCache, data_version, model_version
+from impact_results import PolicyImpactResult
+from scenario_table import ScenarioTable
+from single_flight import SingleFlight
+from prediction_progress import ProgressCallback, report, report_stage
+
+
+def model_files(which: str = 'all', multi_output: bool = False) -> List[str]:
+    """Saved model files that predictions are computed from ('all', 'baseline' or 'policy')"""
+    if multi_output:
+        baseline = [BaselineModel.ARTIFACTS['joint_model'][0]]
+        policy = [PolicyImpactModel.ARTIFACTS['joint_impact_model'][0]]
+    else:
+        baseline = [BaselineModel.ARTIFACTS[attr][0] for attr in ('enrolment_model', 'update_model')]
+        policy = [PolicyImpactModel.ARTIFACTS[attr][0]
+                  for attr in ('enrolment_impact_model', 'update_impact_model')]
+    policy.append("policy_feature_cols.pkl")
+    return {'all': baseline + policy, 'baseline': baseline, 'policy': policy}[which]
+
 
 class PolicyImpactPredictor:
     """Main system for predicting policy impacts"""
     
-    def __init__(self):
-        self.baseline_model = BaselineModel()
-        self.policy_model = PolicyImpactModel()
+    # Forecast periods offered to users; the longest is computed once per policy date
+    FORECAST_HORIZONS = [30, 60, 90, 180]
+    # Per-date policy models kept in memory by predict_for_policy_date
+    POLICY_MODEL_SLOTS = 4
+    
+    def __init__(self, multi_output: bool = False,
+                 result_cache: ResultCache = None, horizons: List[int] = None,
+                 scenario_table: str = None):
+        # Experimental: the joint models are less accurate on updates and not
+        # faster to score than the model pairs, so no production path uses them
+        self.multi_output = multi_output
+        if multi_output:
+            print("Warning: multi-output mode is experimental (see benchmark_multi_output.py)")
+        # Results keyed by scenario, master-data version and model version
+        self.result_cache = result_cache if result_cache is not None else ResultCache()
+        self.horizons = sorted(horizons or self.FORECAST_HORIZONS)
+        # Precomputed results for a window of policy dates (see scenario_table.py)
+        self.scenario_table = ScenarioTable(scenario_table) if scenario_table else None
+        self.registry = ModelRegistry()
+        # Hyperparameters written by the tuner take effect on the next full fit
+        self.baseline_model = BaselineModel(params=self.registry.get('baseline').get('tuned_params'))
+        self.policy_model = PolicyImpactModel(params=self.registry.get('policy_impact').get('tuned_params'))
         self.master_data = None
+        # Set on the per-call copies made by predict_for_policy_date
+        self.policy_scope = None
+        self.progress = None
+        # Shared by those copies: in-memory per-date policy models and policy-free training features
+        self._policy_models = OrderedDict()
+        self._policy_fits = SingleFlight()
+        self._base_features = {}  # data version -> features
+        self._lock = threading.RLock()
         
     def load_and_prepare_data(self, use_cached: bool = True):
         """Load and prepare all data"""
@@ -46,9 +99,18 @@ class PolicyImpactPredictor:
         fe = FeatureEngineer(self.master_data)
         featured_data = fe.create_all_features(policy_date=None)
         
-        self.baseline_model.train_enrolment_model(featured_data)
-        self.baseline_model.train_update_model(featured_data)
-        self.baseline_model.save_models()
+        if self.multi_output:
+            self.baseline_model.train_joint_model(featured_data)
+            self.baseline_model.save_joint_model()
+        else:
+            self.baseline_model.train_enrolment_model(featured_data)
+            self.baseline_model.train_update_model(featured_data)
+            self.baseline_model.save_models()
+        
+        self.registry.record('baseline', 'full_fit', mode=self._model_mode(),
+                             metrics=self.baseline_model.metrics,
+                             data_end=str(featured_data['date'].max().date()),
+                             data_version=data_version(self.master_data))
     
     def train_policy_model(self, policy_date: str):
         """Train policy impact model"""
@@ -58,16 +120,107 @@ class PolicyImpactPredictor:
         fe = FeatureEngineer(self.master_data)
         featured_data = fe.create_all_features(policy_date=policy_date)
         
-        self.policy_model.train_impact_models(featured_data, policy_date)
-        self.policy_model.save_models()
+        if self.multi_output:
+            self.policy_model.train_joint_impact_model(featured_data, policy_date)
+            self.policy_model.save_joint_model()
+        else:
+            self.policy_model.train_impact_models(featured_data, policy_date)
+            self.policy_model.save_models()
+        
+        self.registry.record('policy_impact', 'full_fit', mode=self._model_mode(),
+                             policy_date=policy_date, metrics=self.policy_model.metrics,
+                             data_end=str(featured_data['date'].max().date()),
+                             data_version=data_version(self.master_data))
     
-    def predict_policy_impact(self, policy_date: str, forecast_days: int = 60) -> Dict:
+    def incremental_retrain(self, policy_date: str = None, recent_days: int = 30,
+                            extra_estimators: int = 20, drift_threshold: float = 0.25,
+                            max_estimators: int = None) -> Dict:
+        """
+        Refresh saved models with newly arrived data
+        
+        Models are warm-started on the last `recent_days` days, or refit from
+        scratch when their error on the rows since the last training (the
+        registry's data_end) has drifted past `drift_threshold` relative to
+        the recorded holdout MAE, or when they would exceed `max_estimators`
+        trees. Every action is recorded in the model registry, and refits
+        record their holdout metrics as the new reference.
+        
+        Args:
+            policy_date: Policy date of the impact model (defaults to the one it was trained with)
+        """
+        print("\n=== Incremental Model Refresh ===")
+        self.load_models()
+        
+        policy_date = policy_date or self.registry.get('policy_impact').get('policy_date')
+        fe = FeatureEngineer(self.master_data)
+        featured_data = fe.create_all_features(policy_date=policy_date)
+        data_end = str(featured_data['date'].max().date())
+        
+        options = {'recent_days': recent_days, 'extra_estimators': extra_estimators,
+                   'drift_threshold': drift_threshold, 'max_estimators': max_estimators}
+        
+        baseline_entry = self.registry.get('baseline')
+        baseline_report = self.baseline_model.incremental_update(
+            featured_data, reference_metrics=baseline_entry.get('metrics'),
+            trained_through=baseline_entry.get('data_end'), **options
+        )
+        self.registry.record('baseline', 'incremental', mode=self._model_mode(),
+                             metrics=self.baseline_model.metrics, steps=baseline_report,
+                             data_end=data_end, **options)
+        
+        reports = {'baseline': baseline_report}
+        if policy_date:
+            policy_entry = self.registry.get('policy_impact')
+            policy_report = self.policy_model.incremental_update(
+                featured_data, reference_metrics=policy_entry.get('metrics'),
+                trained_through=policy_entry.get('data_end'), **options
+            )
+            self.registry.record('policy_impact', 'incremental', mode=self._model_mode(),
+                                 policy_date=policy_date, metrics=self.policy_model.metrics,
+                                 steps=policy_report, data_end=data_end, **options)
+            reports['policy_impact'] = policy_report
+        else:
+            print("No policy date known for the impact models - skipping them")
+        
+        self.save_models()
+        return reports
+    
+    def _model_mode(self) -> str:
+        """Registry label of the model layout"""
+        return 'joint' if self.multi_output else 'pair'
+    
+    def save_models(self):
+        """Save baseline and policy models (joint models in multi-output mode)"""
+        if self.multi_output:
+            self.baseline_model.save_joint_model()
+            self.policy_model.save_joint_model()
+        else:
+            self.baseline_model.save_models()
+            self.policy_model.save_models()
+    
+    def load_models(self):
+        """Load saved baseline and policy models (joint models in multi-output mode)"""
+        if self.multi_output:
+            self.baseline_model.load_joint_model()
+            self.policy_model.load_joint_model()
+        else:
+            self.baseline_model.load_models()
+            self.policy_model.load_models()
+    
+    def predict_policy_impact(self, policy_date: str, forecast_days: int = 60,
+                              recursive: bool = False, use_cache: bool = True) -> Dict:
         """
         Predict impact of a policy
         
         Args:
             policy_date: Date when policy will be implemented (YYYY-MM-DD)
             forecast_days: Number of days to forecast after policy
+            recursive: Step the models forward day by day, feeding predictions
+                back into the lag/rolling features, instead of scoring a grid
+                filled with historical state averages
+            use_cache: Serve and store the result in the result cache. Horizons up
+                to the longest of `horizons` are then sliced from one forecast
+                over that horizon, computed once per policy date and model version
             
         Returns:
             Dictionary with predictions and analysis
@@ -76,127 +229,442 @@ class PolicyImpactPredictor:
         print(f"Policy Date: {policy_date}")
         print(f"Forecast Period: {forecast_days} days")
         
+        key = self._result_key(policy_date, forecast_days, recursive) if use_cache else None
+        if key:
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                print("Served from result cache")
+                report(self.progress, 'source', source='result cache')
+                return cached
+        
+        table_result = None if recursive else self._table_lookup(
+            policy_date, forecast_days, per_date_models=self.policy_scope is not None
+        )
+        if table_result is not None:
+            print(f"Served {policy_date} ({forecast_days} days) from scenario table")
+            report(self.progress, 'source', source='scenario table')
+            return table_result
+        
+        if key and forecast_days <= self.horizons[-1]:
+            # Forecasts are causal, so shorter horizons are prefixes of the longest one
+            end = self._forecast_dates(policy_date, forecast_days)[-1]
+            results = self._horizon_result(policy_date, recursive).head(forecast_days, end)
+        else:
+            results = self._analyze_predictions(
+                self._predict_frame(policy_date, forecast_days, recursive), policy_date, forecast_days, recursive
+            )
+        if key:
+            self.result_cache.put(key, results)
+        return results
+    
+    def predict_for_policy_date(self, policy_date: str, forecast_days: int = 60,
+                                recursive: bool = False, use_cache: bool = True,
+                                progress: ProgressCallback = None) -> Dict:
+        """
+        Predict with a policy model trained for `policy_date`
+        
+        Answers from the scenario table when it covers the date (built with
+        per-date policy models on the current data) or from the result cache.
+        Otherwise the policy model for the date is fitted in memory, or loaded
+        when the saved one was trained for it, and kept for later calls.
+        Nothing is saved and this predictor's models are not modified, so
+        calls for different dates can run concurrently; concurrent calls for
+        the same date share one fit. `progress` receives the stage events
+        of this call (see prediction_progress.py).
+        """
+        scoped = copy.copy(self)
+        scoped.policy_scope = policy_date
+        scoped.progress = progress
+        return scoped.predict_policy_impact(policy_date, forecast_days, recursive=recursive, use_cache=use_cache)
+    
+    def warm_up(self, policy_date: str = None, forecast_days: int = 30) -> PolicyImpactResult:
+        """
+        Run one throwaway prediction so the first real request finds everything loaded
+        
+        Scores `policy_date` (default: today) like predict_for_policy_date but
+        bypasses the result cache and the scenario table, so the baseline
+        models, the training features and the date's policy model are loaded
+        or built and the scoring path runs once.
+        """
+        policy_date = policy_date or datetime.now().strftime('%Y-%m-%d')
+        scoped = copy.copy(self)
+        scoped.policy_scope = policy_date
+        return scoped._analyze_predictions(scoped._predict_frame(policy_date, forecast_days, False),
+                                           policy_date, forecast_days)
+    
+    def _policy_model_for(self, policy_date: str) -> PolicyImpactModel:
+        """In-memory policy model trained for `policy_date` on the current data"""
+        key = (policy_date, self._model_mode(), data_version(self.master_data))
+        with self._lock:
+            if key in self._policy_models:
+                self._policy_models.move_to_end(key)
+                return self._policy_models[key]
+        
+        model, _ = self._policy_fits.do(key, lambda: self._fit_policy_model(policy_date))
+        with self._lock:
+            self._policy_models[key] = model
+            self._policy_models.move_to_end(key)
+            while len(self._policy_models) > self.POLICY_MODEL_SLOTS:
+                self._policy_models.popitem(last=False)
+        return model
+    
+    def _fit_policy_model(self, policy_date: str) -> PolicyImpactModel:
+        """Load the saved policy model if it was trained for the date, otherwise fit one without saving it"""
+        model = PolicyImpactModel(params=self.policy_model.params)
+        if self.policy_model_is_current(policy_date):
+            print(f"Using saved policy model for {policy_date}")
+            if self.multi_output:
+                model.load_joint_model()
+            else:
+                model.load_models()
+            return model
+        
+        print(f"Training policy model for {policy_date} (in memory)...")
+        version = data_version(self.master_data)
+        with self._lock:
+            if version not in self._base_features:
+                # Policy columns are the only part of the training features that depends on the date
+                self._base_features.clear()
+                self._base_features[version] = FeatureEngineer(self.master_data).create_all_features()
+            base_features = self._base_features[version]
+        featured_data = FeatureEngineer(base_features).add_policy_features(policy_date)
+        if self.multi_output:
+            model.train_joint_impact_model(featured_data, policy_date)
+        else:
+            model.train_impact_models(featured_data, policy_date)
+        return model
+    
+    def _ensure_baseline(self):
+        """Load the saved baseline models once (training them if there are none)"""
+        with self._lock:
+            loaded = (self.baseline_model.joint_model if self.multi_output
+                      else self.baseline_model.enrolment_model)
+            if loaded is not None:
+                return
+            try:
+                if self.multi_output:
+                    self.baseline_model.load_joint_model()
+                else:
+                    self.baseline_model.load_models()
+            except FileNotFoundError:
+                print("Baseline models not found. Training new models...")
+                self.train_baseline()
+    
+    def _table_lookup(self, policy_date: str, forecast_days: int, per_date_models: bool) -> Dict:
+        """Scenario table result if the table was built for the current data and models, else None"""
+        if self.scenario_table is None or not all(os.path.exists(path) for path in self._model_files('baseline')):
+            return None
+        versions = {
+            'policy_models': 'per_date' if per_date_models else 'saved',
+            'mode': self._model_mode(),
+            'data_version': data_version(self.master_data),
+            'baseline_version': model_version(self._model_files('baseline'))
+        }
+        if per_date_models:
+            versions['policy_params'] = json.dumps(self.policy_model.params, sort_keys=True)
+        else:
+            versions['policy_version'] = model_version(self._model_files('policy'))
+        return self.scenario_table.lookup(policy_date, forecast_days, versions)
+    
+    def _horizon_result(self, policy_date: str, recursive: bool) -> PolicyImpactResult:
+        """Result over the longest configured horizon, cached per policy date and model version"""
+        horizon = self.horizons[-1]
+        key = self._result_key(policy_date, horizon, recursive, kind='horizon')
+        cached = self.result_cache.get(key) if key else None
+        if cached is not None:
+            print(f"Slicing cached {horizon}-day forecast")
+            report(self.progress, 'source', source='horizon cache')
+            return cached
+        
+        results = self._analyze_predictions(self._predict_frame(policy_date, horizon, recursive),
+                                            policy_date, horizon, recursive)
+        if key:
+            self.result_cache.put(key, results)
+        return results
+    
+    def _predict_frame(self, policy_date: str, forecast_days: int, recursive: bool) -> pd.DataFrame:
+        """Run the models for one policy date and return the per-(date, state) predictions"""
+        if self.policy_scope is not None:
+            # Per-call copy: the shared baseline and the date's own policy model
+            self._ensure_baseline()
+            with report_stage(self.progress, 'policy_model'):
+                self.policy_model = self._policy_model_for(self.policy_scope)
+            return self._score_frame(policy_date, forecast_days, recursive)
+        
         # Load models
-        try:
-            self.baseline_model.load_models()
-            self.policy_model.load_models()
-        except:
-            print("Models not found. Training new models...")
-            self.train_baseline()
-            self.train_policy_model(policy_date)
+        with report_stage(self.progress, 'loading'):
+            try:
+                self.load_models()
+            except:
+                print("Models not found. Training new models...")
+                self.train_baseline()
+                self.train_policy_model(policy_date)
+        
+        return self._score_frame(policy_date, forecast_days, recursive)
+    
+    def _score_frame(self, policy_date: str, forecast_days: int, recursive: bool = False) -> pd.DataFrame:
+        """Per-(date, state) predictions from the models currently in memory"""
+        forecast_dates = self._forecast_dates(policy_date, forecast_days)
+        
+        if recursive:
+            forecaster = RecursiveForecaster(self.baseline_model, self.policy_model, self.master_data)
+            with report_stage(self.progress, 'forecast'):
+                return forecaster.forecast(forecast_dates, policy_date)
         
-        # Create forecast dataset
+        with report_stage(self.progress, 'features'):
+            # Create forecast dataframe
+            forecast_df = self._build_forecast_frame(forecast_dates)
+            
+            # Add features
+            fe = FeatureEngineer(forecast_df)
+            forecast_featured = fe.create_all_features(policy_date=policy_date)
+        
+        # Get baseline predictions
+        with report_stage(self.progress, 'baseline'):
+            baseline_pred = self.baseline_model.predict_baseline(forecast_featured)
+        
+        # Get policy impact predictions
+        with report_stage(self.progress, 'impact'):
+            return self.policy_model.calculate_policy_impact(forecast_featured, baseline_pred)
+    
+    def predict_policy_impacts(self, policy_dates: List[str], forecast_days: int = 60,
+                               use_cache: bool = True) -> Dict[str, Dict]:
+        """
+        Predict the impact of several candidate policy dates in one pass
+        
+        On the averaged forecast grid every feature except the calendar and
+        policy columns depends only on the state and on how many days into the
+        forecast a row is (constant from day HISTORY on). The grid is featurized
+        once, the baseline is scored once per distinct (date, warm-up day)
+        across all scenarios, and the policy model scores every scenario in
+        one stacked batch. Results match calling predict_policy_impact per date.
+        
+        Args:
+            policy_dates: Candidate policy dates (YYYY-MM-DD)
+            forecast_days: Number of days to forecast after each policy
+            use_cache: Serve cached dates from the result cache and store the rest
+            
+        Returns:
+            Dictionary mapping each policy date to its predict_policy_impact result
+        """
+        print(f"\n=== Predicting Policy Impact for {len(policy_dates)} Policy Dates ===")
+        print(f"Forecast Period: {forecast_days} days")
+        
+        keys = {date: self._result_key(date, forecast_days) for date in policy_dates} if use_cache else {}
+        results = {}
+        for policy_date, key in keys.items():
+            cached = self.result_cache.get(key) if key else None
+            if cached is not None:
+                results[policy_date] = cached
+        
+        missing = list(dict.fromkeys(date for date in policy_dates if date not in results))
+        if results:
+            print(f"Served {len(results)} dates from result cache")
+        if missing:
+            computed = self._compute_policy_impacts(missing, forecast_days)
+            for policy_date, result in computed.items():
+                if keys.get(policy_date):
+                    self.result_cache.put(keys[policy_date], result)
+            results.update(computed)
+        
+        return {policy_date: results[policy_date] for policy_date in policy_dates}
+    
+    def predict_for_policy_dates(self, policy_dates: List[str], forecast_days: int = 60) -> Dict[str, Dict]:
+        """
+        predict_for_policy_date for several dates, sharing the model work
+        
+        Dates the scenario table or the result cache already answer are
+        looked up. The rest are forecast over the longest horizon in one pass
+        (as in predict_policy_impacts): the grid is featurized once and the
+        baseline scored once per distinct day, and each date's own policy
+        model scores its rows. Those horizon results are cached, so this and
+        later per-date calls for any shorter period slice from them.
+        
+        Returns:
+            Dictionary mapping each policy date to its predict_for_policy_date result
+        """
+        horizon = max(self.horizons[-1], forecast_days)
+        todo = []
+        for policy_date in dict.fromkeys(policy_dates):
+            scoped = copy.copy(self)
+            scoped.policy_scope = policy_date
+            key = scoped._result_key(policy_date, horizon, kind='horizon')
+            if key is None:
+                continue  # no saved baseline yet: computed per date below
+            if (scoped._table_lookup(policy_date, forecast_days, per_date_models=True) is None
+                    and self.result_cache.get(key) is None
+                    and self.result_cache.get(scoped._result_key(policy_date, forecast_days)) is None):
+                todo.append((policy_date, scoped, key))
+        
+        if len(todo) > 1:
+            print(f"\n=== Forecasting {len(todo)} Policy Dates in One Pass ===")
+            policy_models = {policy_date: scoped._policy_model_for(policy_date) for policy_date, scoped, _ in todo}
+            computed = self._compute_policy_impacts([policy_date for policy_date, _, _ in todo], horizon,
+                                                    policy_models=policy_models)
+            for policy_date, _, key in todo:
+                self.result_cache.put(key, computed[policy_date])
+        
+        return {policy_date: self.predict_for_policy_date(policy_date, forecast_days)
+                for policy_date in dict.fromkeys(policy_dates)}
+    
+    def _compute_policy_impacts(self, policy_dates: List[str], forecast_days: int,
+                                policy_models: Dict[str, PolicyImpactModel] = None) -> Dict[str, Dict]:
+        """
+        Run the models for several policy dates in one pass (see predict_policy_impacts)
+        
+        With `policy_models` ({policy_date: model}) each date's rows are scored
+        by its own policy model instead of the saved one.
+        """
+        if policy_models is not None:
+            self._ensure_baseline()
+        else:
+            # Load models
+            try:
+                self.load_models()
+            except:
+                print("Models not found. Training new models...")
+                self.train_baseline()
+                self.train_policy_model(policy_dates[0])
+        
+        # Featured grid rows for warm-up days 0..HISTORY of any forecast
+        template_dates = pd.date_range(start=policy_dates[0], periods=HISTORY + 1, freq='D')
+        fe = FeatureEngineer(self._build_forecast_frame(template_dates))
+        template = fe.create_all_features(policy_date=policy_dates[0])
+        n_states = len(template) // len(template_dates)
+        
+        frames, day_keys = [], []
+        for policy_date in policy_dates:
+            dates = self._forecast_dates(policy_date, forecast_days)
+            warmup_day = np.minimum(np.arange(len(dates)), HISTORY)
+            rows = (warmup_day[:, None] * n_states + np.arange(n_states)).ravel()
+            
+            # Only the calendar and policy columns differ between scenarios
+            fe = FeatureEngineer(template.iloc[rows].assign(date=np.repeat(dates.values, n_states)))
+            fe.df = fe.add_temporal_features()
+            frames.append(fe.add_policy_features(policy_date))
+            day_keys.append(dates.values.astype('datetime64[D]').astype(np.int64) * (HISTORY + 1) + warmup_day)
+        
+        scenarios = pd.concat(frames, ignore_index=True)
+        
+        # Baseline predictions do not depend on the policy: score each distinct day once
+        _, first_day, shared_day = np.unique(np.concatenate(day_keys), return_index=True, return_inverse=True)
+        day_rows = (first_day[:, None] * n_states + np.arange(n_states)).ravel()
+        unique_baseline = self.baseline_model.predict_baseline(scenarios.iloc[day_rows])
+        print(f"Baseline scored on {len(first_day)} distinct days for {len(shared_day)} scenario days")
+        
+        shared_rows = (shared_day.ravel()[:, None] * n_states + np.arange(n_states)).ravel()
+        baseline_pred = pd.DataFrame({
+            'predicted_enrolments': unique_baseline['predicted_enrolments'].values[shared_rows],
+            'predicted_updates': unique_baseline['predicted_updates'].values[shared_rows]
+        })
+        
+        if policy_models is None:
+            # One stacked policy model pass for all scenarios
+            impact_pred = self.policy_model.calculate_policy_impact(scenarios, baseline_pred)
+        else:
+            parts, start = [], 0
+            for policy_date, frame in zip(policy_dates, frames):
+                rows = slice(start, start + len(frame))
+                parts.append(policy_models[policy_date].calculate_policy_impact(scenarios.iloc[rows],
+                                                                                baseline_pred.iloc[rows]))
+                start += len(frame)
+            impact_pred = pd.concat(parts)
+        
+        results = {}
+        start = 0
+        for policy_date, frame in zip(policy_dates, frames):
+            scenario_pred = impact_pred.iloc[start:start + len(frame)].reset_index(drop=True)
+            start += len(frame)
+            results[policy_date] = self._analyze_predictions(scenario_pred, policy_date, forecast_days)
+        
+        return results
+    
+    def _model_files(self, which: str = 'all') -> List[str]:
+        """Saved model files that predictions are computed from ('all', 'baseline' or 'policy')"""
+        return model_files(which, self.multi_output)
+    
+    def _result_key(self, policy_date: str, forecast_days: int, recursive: bool = False,
+                    kind: str = 'result') -> str:
+        """
+        Result cache key of a scenario, or None while models are missing
+        
+        The key includes content hashes of the master data and the saved
+        models, so any retrain or data refresh invalidates cached results.
+        For per-date policy models (predict_for_policy_date) it includes the
+        baseline models and the policy model parameters instead, since the
+        policy model is fitted deterministically from those and the data.
+        """
+        paths = self._model_files('baseline' if self.policy_scope is not None else 'all')
+        if not all(os.path.exists(path) for path in paths):
+            return None
+        models = model_version(paths)
+        if self.policy_scope is not None:
+            models += ";per_date;" + json.dumps(self.policy_model.params, sort_keys=True)
+        return self.result_cache.make_key(
+            kind=kind, policy_date=policy_date, forecast_days=int(forecast_days), recursive=bool(recursive),
+            mode=self._model_mode(), data=data_version(self.master_data), models=models
+        )
+    
+    def policy_model_is_current(self, policy_date: str) -> bool:
+        """True if the saved policy model was trained for `policy_date` on the current master data"""
+        self.registry.reload()
+        entry = self.registry.get('policy_impact')
+        return (entry.get('policy_date') == policy_date
+                and entry.get('mode') == self._model_mode()
+                and entry.get('data_version') == data_version(self.master_data)
+                and all(os.path.exists(path) for path in self._model_files()))
+    
+    def _forecast_dates(self, policy_date: str, forecast_days: int) -> pd.DatetimeIndex:
+        """Dates covered by the forecast of one policy date"""
         policy_dt = pd.to_datetime(policy_date)
         
         # Get date range for forecast
         max_date = self.master_data['date'].max()
         if pd.to_datetime(max_date) < policy_dt:
             # Need to create future dates
-            forecast_dates = pd.date_range(
+            return pd.date_range(
                 start=policy_dt,
                 periods=forecast_days,
                 freq='D'
             )
-        else:
-            # Use existing data around policy date
-            forecast_dates = pd.date_range(
-                start=policy_dt - timedelta(days=30),
-                end=policy_dt + timedelta(days=forecast_days),
-                freq='D'
-            )
-        
-        # Create forecast dataframe
-        states = self.master_data['state'].unique()
-        forecast_data = []
-        
-        for date in forecast_dates:
-            for state in states:
-                # Get historical average for this state
-                state_data = self.master_data[self.master_data['state'] == state]
-                avg_enrol = state_data['total_enrolments'].mean()
-                avg_update = state_data['total_updates'].mean()
-                
-                forecast_data.append({
-                    'date': date,
-                    'state': state,
-                    'total_enrolments': avg_enrol,
-                    'total_updates': avg_update,
-                    'num_districts': state_data['num_districts'].mean()
-                })
-        
-        forecast_df = pd.DataFrame(forecast_data)
-        
-        # Add features
-        fe = FeatureEngineer(forecast_df)
-        forecast_featured = fe.create_all_features(policy_date=policy_date)
-        
-        # Get baseline predictions
-        baseline_pred = self.baseline_model.predict_baseline(forecast_featured)
-        
-        # Get policy impact predictions
-        impact_pred = self.policy_model.calculate_policy_impact(forecast_featured, baseline_pred)
+        # Use existing data around policy date
+        return pd.date_range(
+            start=policy_dt - timedelta(days=30),
+            end=policy_dt + timedelta(days=forecast_days),
+            freq='D'
+        )
+    
+    def _build_forecast_frame(self, forecast_dates: pd.DatetimeIndex) -> pd.DataFrame:
+        """
+        Build the (date x state) forecast grid seeded with historical state averages
         
-        # Analyze results
-        results = self._analyze_predictions(impact_pred, policy_date, forecast_days)
+        The per-state means are computed once and cross joined with the dates,
+        giving the same date-major row order as iterating dates then states.
+        """
+        state_stats = self.master_data.groupby('state', sort=False)[
+            ['total_enrolments', 'total_updates', 'num_districts']
+        ].mean().reset_index()
         
-        return results
+        dates = pd.DataFrame({'date': forecast_dates})
+        return dates.merge(state_stats, how='cross')
     
     def _analyze_predictions(self, predictions: pd.DataFrame, policy_date: str, 
-                           forecast_days: int) -> Dict:
-        """Analyze prediction results"""
-        policy_dt = pd.to_datetime(policy_date)
+                           forecast_days: int, recursive: bool = False) -> Dict:
+        """
+        Analyze prediction results
         
-        # Filter post-policy data
-        post_policy = predictions[predictions['date'] >= policy_dt].copy()
+        The post-policy rows are aggregated in one pass into a compact
+        PolicyImpactResult; the feature columns of `predictions` are not kept.
+        """
+        with report_stage(self.progress, 'analysis'):
+            results = PolicyImpactResult.from_predictions(predictions, policy_date, forecast_days, recursive)
         
-        if len(post_policy) == 0:
+        if results is None:
             return {
                 'error': 'No post-policy data available',
                 'predictions': predictions
             }
         
-        # Overall impact
-        total_enrolment_impact = post_policy['enrolment_impact'].sum()
-        total_update_impact = post_policy['update_impact'].sum()
-        total_people_affected = total_enrolment_impact + total_update_impact
-        
-        # Regional impact
-        regional_impact = post_policy.groupby('state').agg({
-            'enrolment_impact': 'sum',
-            'update_impact': 'sum',
-            'total_impact': 'sum'
-        }).sort_values('total_impact', ascending=False)
-        
-        # Time-series impact
-        daily_impact = post_policy.groupby('date').agg({
-            'enrolment_impact': 'sum',
-            'update_impact': 'sum',
-            'total_impact': 'sum'
-        }).reset_index()
-        
-        # Peak impact day
-        peak_day = daily_impact.loc[daily_impact['total_impact'].idxmax()]
-        
-        # Duration analysis
-        significant_impact_days = len(daily_impact[daily_impact['total_impact'] > 
-                                                   daily_impact['total_impact'].mean()])
-        
-        results = {
-            'summary': {
-                'policy_date': policy_date,
-                'forecast_days': forecast_days,
-                'total_people_affected': int(total_people_affected),
-                'total_enrolment_increase': int(total_enrolment_impact),
-                'total_update_increase': int(total_update_impact),
-                'peak_impact_date': peak_day['date'].strftime('%Y-%m-%d'),
-                'peak_impact_volume': int(peak_day['total_impact']),
-                'significant_impact_duration_days': significant_impact_days
-            },
-            'regional_impact': regional_impact.to_dict(),
-            'daily_impact': daily_impact,
-            'full_predictions': predictions
-        }
-        
         return results
     
     def generate_report(self, results: Dict, output_file: str = "policy_impact_report.txt"):
@@ -0,0 +1,165 @@
+"""
+Production Server Module
+Pre-forking multi-worker server for the web app: data and models are
+loaded once in the parent and shared copy-on-write by the workers
+"""
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """WSGI server that handles requests on a fixed pool of `threads` threads"""
+
+    multithread = True
+    multiprocess = True
+
+    def __init__(self, host: str, port: int, app, threads: int = 8, fd: int = None):
+        super().__init__(host, port, app, fd=fd)
+        self.pool = ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix="request")
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        """Handle one connection on a pool thread (as socketserver.ThreadingMixIn does)"""
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def warm_parent():
+    """Import the app and run its warm-up in this process, before any worker is forked"""
+    import app as web_app
+
+    web_app.start_warmup()
+    while web_app.warmup_state['status'] not in ('ready', 'failed'):
+        time.sleep(0.1)
+    if web_app.warmup_state['status'] == 'failed':
+        raise RuntimeError(f"Warm-up failed: {web_app.warmup_state['error']}")
+    return web_app
+
+
+def _run_worker(web_app, listener: socket.socket, host: str, threads: int):
+    """Worker process: serve from the inherited listening socket until terminated"""
+    # The parent coordinates shutdown; Ctrl+C reaches the whole process group
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: os._exit(0))
+    server = PooledWSGIServer(host, listener.getsockname()[1], web_app.app, threads=threads,
+                              fd=listener.fileno())
+    try:
+        server.serve_forever()
+    finally:
+        os._exit(0)
+
+
+def serve(host: str = '0.0.0.0', port: int = 5000, workers: int = None, threads: int = None,
+          access_log: bool = False):
+    """
+    Warm up once, then fork `workers` processes serving on one shared socket
+
+    The master data, models and warm caches are loaded in the parent before
+    forking, so workers start ready and share those pages copy-on-write
+    (gc.freeze keeps the collector from touching, and so copying, them).
+    The parent restarts workers that exit and stops them all on SIGINT or
+    SIGTERM. Without os.fork (Windows) a single process serves instead.
+
+    Args:
+        workers: Worker processes (default: WEB_WORKERS or the number of cores)
+        threads: Request threads per worker (default: WEB_THREADS or 8)
+        access_log: Log every request
+    """
+    workers = max(1, int(workers or os.environ.get('WEB_WORKERS', os.cpu_count() or 1)))
+    threads = max(1, int(threads or os.environ.get('WEB_THREADS', 8)))
+    if not access_log:
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    # The forked workers already run predictions in parallel; no per-worker process pools
+    os.environ.setdefault('PREDICTION_PROCESSES', '0')
+
+    print(f"Warming up before starting {workers} workers x {threads} threads...")
+    web_app = warm_parent()
+    stages = ", ".join(f"{name} {stage['seconds']:.2f}s" for name, stage in web_app.warmup_state['stages'].items())
+    print(f"Warm-up done in {web_app.warmup_state['seconds']:.2f}s ({stages})")
+
+    if not hasattr(os, 'fork'):
+        print(f"os.fork is unavailable; serving from one process on http://{host}:{port}")
+        PooledWSGIServer(host, port, web_app.app, threads=threads).serve_forever()
+        return
+
+    listener = socket.create_server((host, port), backlog=1024)
+
+    # Objects created so far are long-lived; keep the GC from writing to their pages
+    gc.collect()
+    gc.freeze()
+
+    children = {}
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(web_app, listener, host, threads)
+        children[pid] = time.time()
+
+    stopping = []
+
+    def stop(signum, frame):
+        stopping.append(signum)
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for _ in range(workers):
+        spawn()
+    print(f"Serving on http://{host}:{port} with {workers} workers x {threads} threads "
+          f"(pids {', '.join(map(str, children))})")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        print(f"Worker {pid} exited (status {status}); restarting")
+        if time.time() - started < 1:
+            # Crashing at start: don't restart in a tight loop
+            time.sleep(1)
+        spawn()
+
+    listener.close()
+    print("Server stopped")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the Policy Scenario Builder with pre-forked workers")
+    parser.add_argument('--production', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, help="Worker processes (default: WEB_WORKERS or all cores)")
+    parser.add_argument('--threads', type=int, help="Request threads per worker (default: WEB_THREADS or 8)")
+    parser.add_argument('--access-log', action='store_true', help="Log every request")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.workers, args.threads, args.access_log)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+"""
+Recursive Forecaster Module
+Multi-step forecasting that feeds each day's predictions back into the
+lag, rolling and growth features of the next day
+"""
+
+import pandas as pd
+import numpy as np
+from sklearn import config_context
+from typing import Callable, Dict, List
+import warnings
+warnings.filterwarnings('ignore')
+
+from multi_output_model import JOINT_TARGETS
+
+TARGETS = ['total_enrolments', 'total_updates']
+TRAJECTORIES = ['baseline', 'policy']
+LAGS = [1, 7, 14, 30]
+WINDOWS = [7, 14, 30]
+# Longest look-back of any feature, i.e. the ring buffer length
+HISTORY = max(LAGS + WINDOWS)
+
+
+class StateRingBuffer:
+    """Last HISTORY values per (trajectory, target, state), updated in place"""
+
+    def __init__(self, history: np.ndarray):
+        # history: (..., states, HISTORY), oldest value last-axis first
+        self.values = np.array(history, dtype=np.float64)
+        self.size = self.values.shape[-1]
+        self.head = self.size - 1
+
+    def recent(self) -> np.ndarray:
+        """Values ordered most recent first along the last axis: index k-1 holds lag k"""
+        order = (self.head - np.arange(self.size)) % self.size
+        return self.values[..., order]
+
+    def push(self, latest: np.ndarray):
+        """Overwrite the oldest value of every series with the newest one"""
+        self.head = (self.head + 1) % self.size
+        self.values[..., self.head] = latest
+
+
+class RecursiveForecaster:
+    """
+    Step the baseline and policy models forward one day at a time
+
+    Both models are run on their own trajectory: the baseline trajectory is
+    fed its own predictions, the policy trajectory the policy model's. Each
+    step computes the features of every trajectory, target and state in one
+    batch from the ring buffer and scores all states with a single predict
+    call per model.
+
+    The training features are computed on the day's own value (rolling
+    windows include the current day, growth and deviation compare it to the
+    past). That value is unknown while forecasting, so the state's historical
+    average stands in for it, as in the averaged forecast grid. Carrying the
+    last value forward instead lets the models' errors compound.
+    """
+
+    def __init__(self, baseline_model, policy_model, master_data: pd.DataFrame):
+        self.baseline_model = baseline_model
+        self.policy_model = policy_model
+        self.master_data = master_data.copy()
+        self.master_data['date'] = pd.to_datetime(self.master_data['date'])
+        self.states = self.master_data['state'].unique()
+        # (targets, states) historical means
+        self.state_avg = np.stack([
+            self.master_data.groupby('state', sort=False)[col].mean().reindex(self.states).fillna(0).values
+            for col in TARGETS
+        ])
+
+    def _history(self, start: pd.Timestamp) -> np.ndarray:
+        """
+        Last HISTORY observations per state before `start`, as (targets, states, HISTORY)
+
+        The lag features are row shifts within a state, so the buffers hold the
+        last observed rows rather than calendar days. States with a shorter
+        history are padded with their mean.
+        """
+        observed = self.master_data[self.master_data['date'] < start].sort_values('date')
+        positions = observed.groupby('state', sort=False).cumcount(ascending=False)
+        tail = observed[positions < HISTORY]
+        slot = HISTORY - 1 - positions[positions < HISTORY].values
+        state_idx = pd.Index(self.states).get_indexer(tail['state'])
+
+        history = np.repeat(self.state_avg[:, :, None], HISTORY, axis=2)
+        for t, col in enumerate(TARGETS):
+            history[t, state_idx, slot] = tail[col].values
+        return history
+
+    @staticmethod
+    def _feature_names(models: List) -> List[str]:
+        """Feature order the fitted models expect"""
+        for model in models:
+            if model is not None and hasattr(model, 'feature_names_in_'):
+                return list(model.feature_names_in_)
+        raise ValueError("Models must be fitted on a DataFrame to forecast recursively")
+
+    def _series_features(self, recent: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Lag, rolling, growth and deviation features
+
+        Args:
+            recent: (trajectories, targets, states, HISTORY), most recent first
+
+        Returns:
+            Feature name -> (trajectories, states) array
+        """
+        current = np.broadcast_to(self.state_avg, recent.shape[:-1])
+        window_values = np.concatenate([current[..., None], recent], axis=-1)
+
+        stats = {}
+        for lag in LAGS:
+            stats[f'lag_{lag}'] = recent[..., lag - 1]
+        for window in WINDOWS:
+            values = window_values[..., :window]
+            stats[f'rolling_mean_{window}'] = values.mean(axis=-1)
+            stats[f'rolling_std_{window}'] = values.std(axis=-1, ddof=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            stats['growth'] = np.nan_to_num(current / recent[..., 0] - 1, nan=0.0, posinf=0.0, neginf=0.0)
+            stats['growth_7d'] = np.nan_to_num(current / recent[..., 6] - 1, nan=0.0, posinf=0.0, neginf=0.0)
+        deviation = current - self.state_avg
+
+        features = {}
+        for t, col in enumerate(TARGETS):
+            for name, values in stats.items():
+                features[f'{col}_{name}'] = values[:, t]
+        features['enrolment_deviation'] = deviation[:, TARGETS.index('total_enrolments')]
+        features['update_deviation'] = deviation[:, TARGETS.index('total_updates')]
+        return features
+
+    @staticmethod
+    def _calendar_features(steps: pd.DatetimeIndex, policy_dt: pd.Timestamp) -> Dict[str, np.ndarray]:
+        """Date and policy features for every step"""
+        days_from_policy = np.asarray((steps - policy_dt).days)
+        return {
+            'year': np.asarray(steps.year),
+            'month': np.asarray(steps.month),
+            'day': np.asarray(steps.day),
+            'day_of_week': np.asarray(steps.dayofweek),
+            'week_of_year': np.asarray(steps.isocalendar().week, dtype=np.int64),
+            'is_weekend': (np.asarray(steps.dayofweek) >= 5).astype(int),
+            'policy_active': (days_from_policy >= 0).astype(int),
+            'days_from_policy': days_from_policy,
+            'pre_policy_30d': ((days_from_policy >= -30) & (days_from_policy < 0)).astype(int),
+            'post_policy_30d': ((days_from_policy >= 0) & (days_from_policy < 30)).astype(int),
+            'post_policy_60d': ((days_from_policy >= 0) & (days_from_policy < 60)).astype(int)
+        }
+
+    def _step_predictors(self, joint, enrol_model, update_model) -> Callable[[np.ndarray], np.ndarray]:
+        """Score one feature matrix for both targets, as (targets, states)"""
+        if joint is not None:
+            columns = [JOINT_TARGETS.index(col) for col in TARGETS]
+            return lambda X: joint.predict(X)[:, columns].T
+        return lambda X: np.stack([enrol_model.predict(X), update_model.predict(X)])
+
+    def forecast(self, forecast_dates: pd.DatetimeIndex, policy_date: str) -> pd.DataFrame:
+        """
+        Forecast baseline and policy trajectories over `forecast_dates`
+
+        The recursion starts at the first forecast date from the observations
+        before it; if that lies beyond the data, the gap days are stepped
+        through as well but not returned.
+
+        Returns:
+            Date-major frame with baseline, policy and impact columns per state
+            (the same columns calculate_policy_impact produces for analysis)
+        """
+        policy_dt = pd.to_datetime(policy_date)
+        start = forecast_dates[0]
+        last_observed = self.master_data.loc[self.master_data['date'] < start, 'date'].max()
+        if pd.isna(last_observed):
+            raise ValueError(f"No history before {start.date()} to start the forecast from")
+        steps = pd.date_range(min(start, last_observed + pd.Timedelta(days=1)), forecast_dates[-1], freq='D')
+
+        buffer = StateRingBuffer(np.stack([self._history(start)] * len(TRAJECTORIES)))
+        calendar = self._calendar_features(steps, policy_dt)
+        static = {'state_avg_enrolments': self.state_avg[TARGETS.index('total_enrolments')],
+                  'state_avg_updates': self.state_avg[TARGETS.index('total_updates')]}
+
+        bm, pm = self.baseline_model, self.policy_model
+        models = [(bm.joint_model, bm.enrolment_model, bm.update_model),
+                  (pm.joint_impact_model, pm.enrolment_impact_model, pm.update_impact_model)]
+        names = [self._feature_names([joint, enrol]) for joint, enrol, _ in models]
+        predictors = [self._step_predictors(*trajectory_models) for trajectory_models in models]
+
+        # Every model feature must be one the recursion computes
+        known = set(self._series_features(buffer.recent())) | set(calendar) | set(static)
+        unknown = sorted({name for cols in names for name in cols} - known)
+        if unknown:
+            raise ValueError(f"Cannot forecast recursively: unknown model features {', '.join(unknown)}")
+        matrices = [np.zeros((len(self.states), len(cols))) for cols in names]
+        for X, cols in zip(matrices, names):
+            for j, name in enumerate(cols):
+                if name in static:
+                    X[:, j] = static[name]
+
+        # (steps, trajectories, targets, states)
+        out = np.empty((len(steps), len(TRAJECTORIES), len(TARGETS), len(self.states)))
+
+        # Inputs are built here and known to be finite
+        with config_context(assume_finite=True):
+            for i in range(len(steps)):
+                series = self._series_features(buffer.recent())
+                for k, (X, cols) in enumerate(zip(matrices, names)):
+                    for j, name in enumerate(cols):
+                        if name in series:
+                            X[:, j] = series[name][k]
+                        elif name in calendar:
+                            X[:, j] = calendar[name][i]
+                    out[i, k] = predictors[k](X)
+                # Counts cannot go negative; clip before they feed later steps
+                buffer.push(np.maximum(out[i], 0))
+
+        keep = np.asarray(steps.isin(forecast_dates))
+        n_days = int(keep.sum())
+        frame = pd.DataFrame({
+            'date': np.repeat(steps[keep].values, len(self.states)),
+            'state': np.tile(self.states, n_days)
+        })
+        for k, trajectory in enumerate(TRAJECTORIES):
+            frame[f'{trajectory}_enrolments'] = out[keep, k, TARGETS.index('total_enrolments')].ravel()
+            frame[f'{trajectory}_updates'] = out[keep, k, TARGETS.index('total_updates')].ravel()
+
+        frame['total_enrolments'] = frame['policy_enrolments']
+        frame['total_updates'] = frame['policy_updates']
+        frame['policy_active'] = (frame['date'] >= policy_dt).astype(int)
+        active = frame['policy_active'].values
+        frame['enrolment_impact'] = (frame['policy_enrolments'] - frame['baseline_enrolments']) * active
+        frame['update_impact'] = (frame['policy_updates'] - frame['baseline_updates']) * active
+        frame['total_impact'] = frame['enrolment_impact'] + frame['update_impact']
+        return frame
@@ -0,0 +1,54 @@
+"""
+Daily Model Refresh
+Incrementally updates the saved models with newly arrived data
+(warm-start on recent days, full refit only when drift is detected)
+"""
+
+import argparse
+import time
+import warnings
+warnings.filterwarnings('ignore')
+
+from prediction_system import PolicyImpactPredictor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally refresh the saved prediction models")
+    parser.add_argument('--policy-date', help="Policy date of the impact models (default: from the registry)")
+    parser.add_argument('--recent-days', type=int, default=30, help="Window of new data to train on")
+    parser.add_argument('--extra-trees', type=int, default=20, help="Trees appended per warm start")
+    parser.add_argument('--max-trees', type=int,
+                        help="Tree cap per model; reaching it triggers a full refit (default: twice the configured trees)")
+    parser.add_argument('--drift-threshold', type=float, default=0.25,
+                        help="Relative MAE increase that triggers a full refit")
+    parser.add_argument('--refresh-data', action='store_true', help="Rebuild master data from the raw files")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    predictor = PolicyImpactPredictor()
+    predictor.load_and_prepare_data(use_cached=not args.refresh_data)
+
+    reports = predictor.incremental_retrain(
+        policy_date=args.policy_date,
+        recent_days=args.recent_days,
+        extra_estimators=args.extra_trees,
+        drift_threshold=args.drift_threshold,
+        max_estimators=args.max_trees
+    )
+
+    print("\n" + "=" * 60)
+    print("REFRESH SUMMARY")
+    print("=" * 60)
+    for model_name, steps in reports.items():
+        for target, step in steps.items():
+            if step['action'] == 'skipped':
+                print(f"{model_name:15s} {target:10s} skipped ({step['reason']})")
+                continue
+            reason = f" ({step['reason']})" if step['reason'] else ''
+            print(f"{model_name:15s} {target:10s} {step['action']:10s} "
+                  f"drift={step['drift']:+.2%}  trees={step['n_estimators']}  {step['seconds']:.2f}s{reason}")
+    print(f"\nTotal time: {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
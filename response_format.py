@@ -0,0 +1,154 @@
+"""
+Response Format Module
+Compact columnar encoding of prediction responses and response compression
+"""
+
+import gzip
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Media type of the columnar format (negotiated with Accept or ?format=columnar)
+COLUMNAR_MEDIA_TYPE = 'application/vnd.policy-impact.columnar+json'
+COLUMNAR_VERSION = 1
+
+# Row tables of a response, also inside 'uncertainty'
+TABLE_KEYS = ('regional_impact', 'daily_impact', 'regional', 'daily')
+
+# Content encodings offered, best first
+CONTENT_ENCODINGS = (['br'] if BROTLI_AVAILABLE else []) + ['gzip']
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_BYTES = 1024
+
+
+class _Dictionary:
+    """Values seen so far and their codes (first-seen order)"""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def encode(self, values: List) -> List[int]:
+        codes = []
+        for value in values:
+            if value not in self._codes:
+                self._codes[value] = len(self.values)
+                self.values.append(value)
+            codes.append(self._codes[value])
+        return codes
+
+
+def _encode_dates(values: List[str]) -> Dict:
+    """ISO dates as the first date and day deltas from the previous one"""
+    days = [date.fromisoformat(value).toordinal() for value in values]
+    return {'start': values[0], 'deltas': [0] + [b - a for a, b in zip(days, days[1:])]}
+
+
+def _decode_dates(column: Dict) -> List[str]:
+    day = date.fromisoformat(column['start'])
+    dates = []
+    for delta in column['deltas']:
+        day += timedelta(days=delta)
+        dates.append(day.isoformat())
+    return dates
+
+
+def _encode_table(records: List[Dict], states: _Dictionary) -> Dict:
+    """
+    Column arrays of a list of row dicts
+
+    'state' columns hold codes into the shared state dictionary, 'date'
+    columns are delta-encoded, other string columns (risk levels) carry
+    their own dictionary, and numeric columns are plain arrays.
+    """
+    columns = {}
+    for key in (records[0] if records else {}):
+        values = [row[key] for row in records]
+        if key == 'state':
+            columns[key] = {'dictionary': 'state', 'codes': states.encode(values)}
+        elif key == 'date':
+            columns[key] = _encode_dates(values)
+        elif all(isinstance(value, str) for value in values):
+            local = _Dictionary()
+            codes = local.encode(values)
+            columns[key] = {'values': local.values, 'codes': codes}
+        else:
+            columns[key] = values
+    return {'length': len(records), 'columns': columns}
+
+
+def _decode_table(table: Dict, dictionaries: Dict) -> List[Dict]:
+    columns = {}
+    for key, column in table['columns'].items():
+        if isinstance(column, list):
+            columns[key] = column
+        elif 'deltas' in column:
+            columns[key] = _decode_dates(column)
+        else:
+            values = dictionaries[column['dictionary']] if 'dictionary' in column else column['values']
+            columns[key] = [values[code] for code in column['codes']]
+    return [dict(zip(columns, row)) for row in zip(*columns.values())] if columns else []
+
+
+def to_columnar(response: Dict) -> Dict:
+    """
+    Columnar form of a prediction response
+
+    The row tables (regional_impact, daily_impact and the uncertainty bands)
+    become column arrays, and state names anywhere in the response are
+    replaced by codes into the one 'state' dictionary. Other fields are
+    unchanged; from_columnar restores the row form.
+    """
+    states = _Dictionary()
+    encoded = {'format': 'columnar', 'version': COLUMNAR_VERSION}
+    for key, value in response.items():
+        if key in TABLE_KEYS and isinstance(value, list):
+            encoded[key] = _encode_table(value, states)
+        elif key == 'risk_assessment':
+            encoded[key] = {level: {'dictionary': 'state', 'codes': states.encode(names)}
+                            for level, names in value.items()}
+        elif key == 'uncertainty' and isinstance(value, dict):
+            encoded[key] = {band_key: _encode_table(band, states) if band_key in TABLE_KEYS else band
+                            for band_key, band in value.items()}
+        else:
+            encoded[key] = value
+    encoded['dictionaries'] = {'state': states.values}
+    return encoded
+
+
+def from_columnar(encoded: Dict) -> Dict:
+    """Row form of a columnar response (as returned without the columnar format)"""
+    dictionaries = encoded['dictionaries']
+    response = {}
+    for key, value in encoded.items():
+        if key in ('format', 'version', 'dictionaries'):
+            continue
+        if key in TABLE_KEYS:
+            response[key] = _decode_table(value, dictionaries)
+        elif key == 'risk_assessment':
+            response[key] = {level: [dictionaries['state'][code] for code in column['codes']]
+                             for level, column in value.items()}
+        elif key == 'uncertainty':
+            response[key] = {band_key: _decode_table(band, dictionaries) if band_key in TABLE_KEYS else band
+                             for band_key, band in value.items()}
+        else:
+            response[key] = value
+    return response
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Body compressed with 'br' or 'gzip'"""
+    if encoding == 'br':
+        # Moderate quality: responses are compressed per request
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def choose_encoding(accept_encodings) -> Optional[str]:
+    """Best offered content encoding the client accepts (werkzeug Accept), or None"""
+    return accept_encodings.best_match(CONTENT_ENCODINGS)
@@ -0,0 +1,189 @@
+"""
+Result Cache Module
+Memoizes prediction results in a memory-bounded LRU with an optional
+on-disk tier, keyed by scenario, master-data version and model version
+"""
+
+import copy
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+import joblib
+import pandas as pd
+from typing import Dict, Iterable, Optional
+
+# path -> (mtime_ns, size, digest); files are only re-hashed when they change
+_file_digests = {}
+
+
+def data_version(df: pd.DataFrame) -> str:
+    """Content hash of a DataFrame (changes whenever any value changes)"""
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    hasher.update(repr(list(df.columns)).encode())
+    return hasher.hexdigest()
+
+
+def file_digest(path: str) -> Optional[str]:
+    """Content hash of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    cached = _file_digests.get(path)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            hasher.update(block)
+    _file_digests[path] = (stat.st_mtime_ns, stat.st_size, hasher.hexdigest())
+    return _file_digests[path][2]
+
+
+def model_version(paths: Iterable[str]) -> str:
+    """
+    Combined content hash of the saved model files
+
+    Content rather than timestamps: retraining on the same data with the
+    same parameters writes identical files and keeps the cached results.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        hasher.update(f"{path}={file_digest(path)};".encode())
+    return hasher.hexdigest()
+
+
+def result_size(result: Dict) -> int:
+    """Approximate memory footprint of a prediction result in bytes"""
+    if hasattr(result, 'nbytes'):
+        return int(result.nbytes)
+    size = 0
+    for value in result.values():
+        if isinstance(value, pd.DataFrame):
+            size += int(value.memory_usage(deep=True).sum())
+        elif hasattr(value, 'nbytes'):
+            size += int(value.nbytes)
+        elif isinstance(value, dict):
+            size += 64 * sum(len(inner) if isinstance(inner, dict) else 1 for inner in value.values())
+        else:
+            size += 64
+    return size
+
+
+class ResultCache:
+    """
+    Thread-safe LRU of prediction results bounded by total size
+
+    With `disk_dir` set, every stored result is also written to disk and
+    memory misses fall back to it, so results survive restarts. Keys embed
+    the data and model versions, so entries for old data or models are never
+    hit again; they age out of the LRU, and the disk tier drops its least
+    recently used files beyond `max_disk_bytes`.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 ** 2, disk_dir: str = None,
+                 max_disk_bytes: int = 1024 ** 3):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()  # key -> (result, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(**parts) -> str:
+        """Stable key from named scenario/version parts"""
+        text = ";".join(f"{name}={parts[name]}" for name in sorted(parts))
+        return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Cached result for `key` (a private copy), or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return copy.deepcopy(entry[0])
+
+        result = self._read_disk(key)
+        with self._lock:
+            if result is None:
+                self.stats['misses'] += 1
+                return None
+            self.stats['disk_hits'] += 1
+            self._insert(key, result)
+        return copy.deepcopy(result)
+
+    def put(self, key: str, result: Dict):
+        """Store a result (a private copy is kept)"""
+        result = copy.deepcopy(result)
+        with self._lock:
+            self._insert(key, result)
+        self._write_disk(key, result)
+
+    def clear(self):
+        """Drop all in-memory entries"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _insert(self, key: str, result: Dict):
+        """Add an entry and evict least recently used ones beyond max_bytes (lock held)"""
+        size = result_size(result)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (result, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+            self.stats['evictions'] += 1
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def _read_disk(self, key: str) -> Optional[Dict]:
+        """Load a result from the disk tier, if present and readable"""
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            result = joblib.load(path)
+            os.utime(path)  # mark as recently used
+            return result
+        except (FileNotFoundError, EOFError, ValueError, OSError):
+            return None
+
+    def _write_disk(self, key: str, result: Dict):
+        """Write a result to the disk tier and prune it to max_disk_bytes"""
+        if not self.disk_dir:
+            return
+        tmp_path = os.path.join(self.disk_dir, f".{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+        joblib.dump(result, tmp_path)
+        os.replace(tmp_path, self._disk_path(key))
+
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith('.pkl'):
+                try:
+                    stat = os.stat(os.path.join(self.disk_dir, name))
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.disk_dir, name))
+            except FileNotFoundError:
+                pass
+            total -= size
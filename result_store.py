@@ -0,0 +1,161 @@
+"""
+Result Store Module
+Keeps prediction responses server-side under a result ID so exports and
+visualizations can refer to them instead of re-uploading them
+"""
+
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class ResultStore:
+    """
+    Thread-safe store of per-request results with TTL and memory-budget eviction
+
+    Each entry is a dict of named parts (the response under 'result', later
+    the chart image under 'viz_image'). Entries expire `ttl_seconds` after
+    they were last used, and the least recently used ones are evicted once
+    the entries exceed `max_bytes` (their pickled size). With `disk_dir`
+    set, entries are also written to disk, so processes that share the
+    directory (pre-forked workers) can serve each other's result IDs.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, max_bytes: int = 128 * 1024 ** 2,
+                 disk_dir: str = None, max_disk_bytes: int = 1024 ** 3):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()  # id -> (parts, size, last_used)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {'stored': 0, 'hits': 0, 'disk_hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0}
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def put(self, result: Dict, result_id: str = None, **parts) -> str:
+        """Store a result (and optional extra parts) under `result_id` or a new ID, and return the ID"""
+        result_id = result_id or uuid.uuid4().hex
+        entry = {'result': result, **parts}
+        payload = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._insert(result_id, entry, len(payload))
+            self.stats['stored'] += 1
+        self._write_disk(result_id, payload)
+        return result_id
+
+    def update(self, result_id: str, **parts) -> bool:
+        """Add or replace parts of a stored entry; False if the ID is unknown or expired"""
+        entry = self.get(result_id)
+        if entry is None:
+            return False
+        entry = {**entry, **parts}
+        payload = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._insert(result_id, entry, len(payload))
+        self._write_disk(result_id, payload)
+        return True
+
+    def get(self, result_id: str) -> Optional[Dict]:
+        """Parts stored under `result_id` (treat as read-only), or None if unknown or expired"""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            item = self._entries.get(result_id)
+            if item is not None:
+                entry, size, _ = item
+                self._entries[result_id] = (entry, size, now)
+                self._entries.move_to_end(result_id)
+                self.stats['hits'] += 1
+                return entry
+
+        loaded = self._read_disk(result_id, now)
+        with self._lock:
+            if loaded is None:
+                self.stats['misses'] += 1
+                return None
+            entry, size = loaded
+            self.stats['disk_hits'] += 1
+            self._insert(result_id, entry, size)
+        return entry
+
+    def summary(self) -> Dict:
+        """Entry count, bytes held and counters"""
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes, 'max_bytes': self.max_bytes,
+                    'ttl_seconds': self.ttl_seconds, **self.stats}
+
+    def _insert(self, result_id: str, entry: Dict, size: int):
+        """Add an entry and evict least recently used ones beyond max_bytes (lock held)"""
+        if result_id in self._entries:
+            self._bytes -= self._entries.pop(result_id)[1]
+        if size > self.max_bytes:
+            return
+        self._entries[result_id] = (entry, size, time.time())
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+            self.stats['evictions'] += 1
+
+    def _expire(self, now: float):
+        """Drop entries unused for longer than the TTL (lock held; oldest first)"""
+        while self._entries:
+            result_id, (_, size, last_used) = next(iter(self._entries.items()))
+            if now - last_used <= self.ttl_seconds:
+                break
+            del self._entries[result_id]
+            self._bytes -= size
+            self.stats['expired'] += 1
+
+    def _disk_path(self, result_id: str) -> str:
+        return os.path.join(self.disk_dir, f"{result_id}.pkl")
+
+    def _read_disk(self, result_id: str, now: float):
+        """(entry, size) from the disk tier if present and not expired, else None"""
+        if not self.disk_dir or not result_id.isalnum():
+            return None
+        path = self._disk_path(result_id)
+        try:
+            if now - os.stat(path).st_mtime > self.ttl_seconds:
+                os.remove(path)
+                return None
+            with open(path, 'rb') as f:
+                payload = f.read()
+            os.utime(path)  # mark as recently used
+            return pickle.loads(payload), len(payload)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError, OSError):
+            return None
+
+    def _write_disk(self, result_id: str, payload: bytes):
+        """Write an entry to the disk tier and drop expired files and files beyond max_disk_bytes"""
+        if not self.disk_dir:
+            return
+        tmp_path = os.path.join(self.disk_dir, f".{result_id}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, self._disk_path(result_id))
+
+        now = time.time()
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith('.pkl'):
+                try:
+                    stat = os.stat(os.path.join(self.disk_dir, name))
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for mtime, size, name in sorted(files):
+            if total <= self.max_disk_bytes and now - mtime <= self.ttl_seconds:
+                break
+            try:
+                os.remove(os.path.join(self.disk_dir, name))
+            except FileNotFoundError:
+                pass
+            total -= size
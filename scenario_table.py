@@ -0,0 +1,270 @@
+"""
+Scenario Table Module
+Offline job that precomputes policy impact results for every candidate
+policy date in a window, stored as compact arrays indexed by policy date
+"""
+
+import argparse
+import json
+import os
+import time
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+import warnings
+warnings.filterwarnings('ignore')
+
+from feature_engineering import FeatureEngineer
+from impact_results import IMPACT_COLUMNS, PolicyImpactResult, RegionalImpact
+from policy_impact_model import PolicyImpactModel
+from result_cache import ResultCache
+
+TABLE_DIR = "scenario_table"
+
+# Stored per policy date and horizon, in this order
+SUMMARY_FIELDS = ['total_enrolment_increase', 'total_update_increase', 'total_people_affected',
+                  'peak_day', 'peak_impact_volume', 'significant_impact_duration_days']
+
+# Per-process predictor, loaded once by the pool initializer
+_worker = {}
+
+
+def _init_worker(options: Dict):
+    """Load data and models once per worker process"""
+    from prediction_system import PolicyImpactPredictor
+
+    predictor = PolicyImpactPredictor(result_cache=ResultCache(max_bytes=0),
+                                      horizons=options['horizons'])
+    predictor.load_and_prepare_data()
+    predictor.load_models()
+    _worker['predictor'] = predictor
+    if options['per_date_models']:
+        # Policy columns are the only part of the training features that depends on the date
+        _worker['base_features'] = FeatureEngineer(predictor.master_data).create_all_features()
+
+
+def _train_policy_model(predictor, policy_date: str):
+    """Fit a policy model for `policy_date` in memory (same fit as train_policy_model)"""
+    featured = FeatureEngineer(_worker['base_features']).add_policy_features(policy_date)
+    model = PolicyImpactModel(params=predictor.policy_model.params)
+    model.train_impact_models(featured, policy_date)
+    predictor.policy_model = model
+
+
+def _build_chunk(task: Dict) -> Dict:
+    """Score a block of policy dates over the longest horizon and slice every horizon"""
+    predictor = _worker['predictor']
+    horizons, states = task['horizons'], task['states']
+    n_dates, max_days = len(task['dates']), horizons[-1] + 1
+
+    arrays = {
+        'daily': np.zeros((n_dates, max_days, len(IMPACT_COLUMNS))),
+        'regional': np.zeros((n_dates, len(horizons), len(states), len(IMPACT_COLUMNS))),
+        'summary': np.zeros((n_dates, len(horizons), len(SUMMARY_FIELDS)), dtype=np.int64),
+        'post_days': np.zeros((n_dates, len(horizons)), dtype=np.int32),
+        'state_daily': np.zeros((n_dates, max_days, len(states), 2), dtype=np.float32)
+    }
+
+    for i, policy_date in enumerate(task['dates']):
+        if task['per_date_models']:
+            _train_policy_model(predictor, policy_date)
+        policy_dt = pd.to_datetime(policy_date)
+        frame = predictor._score_frame(policy_date, horizons[-1])
+        full = predictor._analyze_predictions(frame, policy_date, horizons[-1])
+        state_order = pd.Index(full.states).get_indexer(states)
+
+        for h, horizon in enumerate(horizons):
+            result = full.head(horizon, predictor._forecast_dates(policy_date, horizon)[-1])
+            summary = result.summary
+            regional = result.regional_impact.to_frame().reindex(states).fillna(0)
+
+            arrays['post_days'][i, h] = len(result.daily)
+            arrays['regional'][i, h] = regional[IMPACT_COLUMNS].values
+            peak_day = (pd.to_datetime(summary['peak_impact_date']) - policy_dt).days
+            arrays['summary'][i, h] = [summary[field] if field != 'peak_day' else peak_day
+                                       for field in SUMMARY_FIELDS]
+
+        # Daily sums of shorter horizons are prefixes of the longest one
+        n_days = len(full.daily)
+        arrays['daily'][i, :n_days] = full.daily
+        arrays['state_daily'][i, :n_days] = full.grid[state_order][:, full.observed_days, :2].transpose(1, 0, 2)
+
+    return {'index': task['index'], 'arrays': arrays}
+
+
+def build_scenario_table(start: str = None, days: int = 365, horizons: List[int] = None,
+                         per_date_models: bool = True, directory: str = TABLE_DIR, n_jobs: int = None) -> Dict:
+    """
+    Precompute impact results for every policy date in [start, start + days)
+
+    Args:
+        start: First policy date (default: today)
+        days: Number of consecutive policy dates
+        horizons: Forecast periods to store (default: PolicyImpactPredictor.FORECAST_HORIZONS)
+        per_date_models: Train a policy model for each date, as the web app
+            does per request; otherwise use the saved policy model for all dates
+        directory: Where the table is written
+        n_jobs: Worker processes (default: all cores)
+
+    Returns:
+        Table metadata
+    """
+    from prediction_system import PolicyImpactPredictor
+    from result_cache import data_version, model_version
+
+    started = time.perf_counter()
+    predictor = PolicyImpactPredictor(horizons=horizons)
+    predictor.load_and_prepare_data()
+    horizons = predictor.horizons
+    start = str(pd.to_datetime(start or datetime.now().date()).date())
+    dates = [str(d.date()) for d in pd.date_range(start, periods=days, freq='D')]
+    states = list(predictor.master_data['state'].unique())
+    n_jobs = n_jobs or os.cpu_count()
+
+    meta = {
+        'start': start,
+        'n_dates': len(dates),
+        'horizons': horizons,
+        'states': states,
+        'policy_models': 'per_date' if per_date_models else 'saved',
+        'mode': predictor._model_mode(),
+        'data_version': data_version(predictor.master_data),
+        'baseline_version': model_version(predictor._model_files('baseline'))
+    }
+    if per_date_models:
+        meta['policy_params'] = json.dumps(predictor.policy_model.params, sort_keys=True)
+    else:
+        meta['policy_version'] = model_version(predictor._model_files('policy'))
+
+    print(f"Building scenario table: {len(dates)} policy dates from {start}, "
+          f"horizons {horizons}, {meta['policy_models']} policy models, {n_jobs} workers")
+
+    n_chunks = min(len(dates), n_jobs * 4)
+    chunks = [list(idx) for idx in np.array_split(np.arange(len(dates)), n_chunks) if len(idx)]
+    options = {'horizons': horizons, 'per_date_models': per_date_models}
+    tasks = [{'index': idx, 'dates': [dates[i] for i in idx], 'horizons': horizons,
+              'states': states, 'per_date_models': per_date_models} for idx in chunks]
+
+    arrays = None
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(options,)) as pool:
+        for done, out in enumerate(pool.map(_build_chunk, tasks), 1):
+            if arrays is None:
+                arrays = {name: np.zeros((len(dates),) + block.shape[1:], dtype=block.dtype)
+                          for name, block in out['arrays'].items()}
+            for name, block in out['arrays'].items():
+                arrays[name][out['index']] = block
+            print(f"  {done}/{len(tasks)} chunks done")
+
+    meta['built_at'] = datetime.now().isoformat(timespec='seconds')
+    meta['build_seconds'] = round(time.perf_counter() - started, 1)
+    _write_table(directory, arrays, meta)
+    print(f"Scenario table written to {directory}/ in {meta['build_seconds']}s")
+    return meta
+
+
+def _write_table(directory: str, arrays: Dict[str, np.ndarray], meta: Dict):
+    """Replace the table files atomically, metadata last"""
+    os.makedirs(directory, exist_ok=True)
+    for name, array in arrays.items():
+        tmp_path = os.path.join(directory, f".{name}.{os.getpid()}.npy")
+        np.save(tmp_path, array)
+        os.replace(tmp_path, os.path.join(directory, f"{name}.npy"))
+    tmp_path = os.path.join(directory, f".meta.{os.getpid()}.json")
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, os.path.join(directory, "meta.json"))
+
+
+class ScenarioTable:
+    """Read-only, memory-mapped view of a built scenario table"""
+
+    def __init__(self, directory: str = TABLE_DIR):
+        self.directory = directory
+        self.meta = None
+        self._meta_mtime = None
+
+    def _refresh(self):
+        """(Re)open the table if it was built or rebuilt since the last lookup"""
+        meta_path = os.path.join(self.directory, "meta.json")
+        try:
+            mtime = os.stat(meta_path).st_mtime_ns
+        except FileNotFoundError:
+            self.meta = None
+            return
+        if mtime == self._meta_mtime:
+            return
+        with open(meta_path) as f:
+            self.meta = json.load(f)
+        for name in ('daily', 'regional', 'summary', 'post_days', 'state_daily'):
+            setattr(self, name, np.load(os.path.join(self.directory, f"{name}.npy"), mmap_mode='r'))
+        self._meta_mtime = mtime
+
+    def lookup(self, policy_date: str, forecast_days: int, versions: Dict) -> Optional[PolicyImpactResult]:
+        """
+        Stored result for a scenario, or None if the table cannot answer it
+
+        The table answers only if every entry of `versions` matches its
+        metadata (data, model and policy-model versions), the date lies in its
+        window and `forecast_days` is one of its horizons.
+
+        The result is the PolicyImpactResult predict_policy_impact returns;
+        its per-(date, state) impacts are stored in single precision.
+        """
+        self._refresh()
+        meta = self.meta
+        if meta is None or any(meta.get(name) != value for name, value in versions.items()):
+            return None
+        if forecast_days not in meta['horizons']:
+            return None
+        policy_dt = pd.to_datetime(policy_date)
+        i = (policy_dt - pd.to_datetime(meta['start'])).days
+        if not 0 <= i < meta['n_dates']:
+            return None
+        h = meta['horizons'].index(forecast_days)
+        n_days = int(self.post_days[i, h])
+
+        daily = np.array(self.daily[i, :n_days])
+        sums = np.array(self.regional[i, h])
+        order = np.argsort(-sums[:, IMPACT_COLUMNS.index('total_impact')], kind='stable')
+        states = np.asarray(meta['states'], dtype=object)
+
+        summary = dict(zip(SUMMARY_FIELDS, (int(v) for v in self.summary[i, h])))
+        peak_day = summary.pop('peak_day')
+        summary = {
+            'policy_date': policy_date,
+            'forecast_days': forecast_days,
+            'total_people_affected': summary['total_people_affected'],
+            'total_enrolment_increase': summary['total_enrolment_increase'],
+            'total_update_increase': summary['total_update_increase'],
+            'peak_impact_date': (policy_dt + pd.Timedelta(days=peak_day)).strftime('%Y-%m-%d'),
+            'peak_impact_volume': summary['peak_impact_volume'],
+            'significant_impact_duration_days': summary['significant_impact_duration_days']
+        }
+
+        # (states, days, 3) impact grid from the single-precision per-state columns
+        state_daily = np.array(self.state_daily[i, :n_days], dtype=np.float64).transpose(1, 0, 2)
+        grid = np.concatenate([state_daily, state_daily.sum(axis=2, keepdims=True)], axis=2)
+
+        return PolicyImpactResult(summary, RegionalImpact(states[order], sums[order]), np.arange(n_days),
+                                  daily, states, grid)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the scenario table for a window of policy dates")
+    parser.add_argument('--start', help="First policy date (default: today)")
+    parser.add_argument('--days', type=int, default=365, help="Number of consecutive policy dates")
+    parser.add_argument('--horizons', type=int, nargs='+', help="Forecast periods to store")
+    parser.add_argument('--saved-model', action='store_true',
+                        help="Score every date with the saved policy model instead of training one per date")
+    parser.add_argument('--output', default=TABLE_DIR, help="Table directory")
+    parser.add_argument('--jobs', type=int, help="Worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    build_scenario_table(start=args.start, days=args.days, horizons=args.horizons,
+                         per_date_models=not args.saved_model, directory=args.output, n_jobs=args.jobs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Single Flight Module
+Coalesces concurrent calls with the same key into one execution
+"""
+
+import threading
+from typing import Any, Callable, Hashable, Tuple
+
+
+class _Call:
+    """One in-flight execution and the callers waiting on it"""
+
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time and share its outcome
+
+    The first caller for a key executes the function; callers arriving while
+    it runs wait for it and receive the same result object (or exception),
+    so shared results must be treated as read-only. Calls with different
+    keys do not wait on each other. Nothing is remembered once a call has
+    finished - later calls execute again (pair with a cache for that).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {'executed': 0, 'shared': 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Execute `fn` for `key`, or wait for the execution already in flight
+
+        Returns:
+            (result, shared) - shared is True when the result came from
+            another caller's execution
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats['executed'] += 1
+            else:
+                call.waiters += 1
+                self.stats['shared'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self) -> int:
+        """Number of keys currently executing"""
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,153 @@
+"""
+Tree Artifacts Module
+Flat, memory-mappable storage format for the fitted tree ensembles
+
+Every tree of an ensemble is flattened into shared node arrays saved as
+.npy files. Loading opens them with mmap_mode='r', so the weights are paged
+in lazily and shared through the OS page cache between all processes
+(e.g. Flask/WSGI workers) serving the same artifacts.
+"""
+
+import json
+import os
+import pandas as pd
+import numpy as np
+from sklearn.compose import TransformedTargetRegressor
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.preprocessing import StandardScaler
+from typing import Dict
+
+ARRAYS = ['left', 'right', 'feature', 'threshold', 'value', 'roots']
+
+# Rows scored per traversal chunk (bounds the (trees x rows) working set)
+CHUNK_ROWS = 4096
+
+
+def export_ensemble(model, directory: str) -> Dict:
+    """
+    Flatten a fitted ensemble into `directory`
+
+    Supports GradientBoostingRegressor, forest regressors (RandomForest,
+    ExtraTrees) and a TransformedTargetRegressor with a StandardScaler
+    around a forest (the joint multi-output models).
+
+    Returns:
+        The artifact metadata
+    """
+    offset, scale = None, None
+    if isinstance(model, TransformedTargetRegressor):
+        if not isinstance(model.transformer_, StandardScaler):
+            raise ValueError("Only StandardScaler target transforms can be exported")
+        offset, scale = model.transformer_.mean_, model.transformer_.scale_
+        model = model.regressor_
+
+    if isinstance(model, GradientBoostingRegressor):
+        trees = [stage[0] for stage in model.estimators_]
+        init = model.init_
+        base = np.ravel(init.constant_) if hasattr(init, 'constant_') else np.zeros(1)
+        meta = {'kind': 'boosting', 'learning_rate': model.learning_rate, 'base': base.tolist()}
+    elif hasattr(model, 'estimators_'):
+        trees = list(model.estimators_)
+        meta = {'kind': 'forest'}
+    else:
+        raise ValueError(f"Unsupported model type: {type(model).__name__}")
+
+    lefts, rights, features, thresholds, values, roots = [], [], [], [], [], []
+    start = 0
+    for tree in trees:
+        t = tree.tree_
+        nodes = np.arange(t.node_count)
+        is_leaf = t.children_left == -1
+        # Leaves point to themselves and always go "left", so traversal needs no leaf test
+        lefts.append(np.where(is_leaf, nodes, t.children_left) + start)
+        rights.append(np.where(is_leaf, nodes, t.children_right) + start)
+        features.append(np.where(is_leaf, 0, t.feature))
+        thresholds.append(np.where(is_leaf, np.inf, t.threshold))
+        values.append(t.value[:, :, 0])
+        roots.append(start)
+        start += t.node_count
+
+    arrays = {
+        'left': np.concatenate(lefts).astype(np.int32),
+        'right': np.concatenate(rights).astype(np.int32),
+        'feature': np.concatenate(features).astype(np.int32),
+        'threshold': np.concatenate(thresholds).astype(np.float64),
+        'value': np.concatenate(values).astype(np.float64),
+        'roots': np.asarray(roots, dtype=np.int32)
+    }
+
+    meta.update({
+        'n_trees': len(trees),
+        'n_outputs': int(arrays['value'].shape[1]),
+        'max_depth': int(max(tree.tree_.max_depth for tree in trees)),
+        'feature_names': [str(name) for name in getattr(model, 'feature_names_in_', [])],
+        'target_offset': None if offset is None else np.ravel(offset).tolist(),
+        'target_scale': None if scale is None else np.ravel(scale).tolist()
+    })
+
+    # Files are replaced (new inodes), so processes that already mapped the
+    # previous export keep reading consistent old arrays
+    os.makedirs(directory, exist_ok=True)
+    for name, array in arrays.items():
+        tmp_path = os.path.join(directory, f".{name}.{os.getpid()}.npy")
+        np.save(tmp_path, array)
+        os.replace(tmp_path, os.path.join(directory, f"{name}.npy"))
+    # Metadata is written last: its presence marks a complete artifact
+    tmp_path = os.path.join(directory, f".meta.{os.getpid()}.json")
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(directory, "meta.json"))
+
+    return meta
+
+
+def is_fresh(directory: str, source_path: str) -> bool:
+    """True if the artifact exists and is not older than the pickle it was exported from"""
+    meta_path = os.path.join(directory, "meta.json")
+    if not os.path.exists(meta_path):
+        return False
+    if not os.path.exists(source_path):
+        return True
+    return os.path.getmtime(meta_path) >= os.path.getmtime(source_path)
+
+
+class MappedEnsemble:
+    """Read-only tree ensemble backed by memory-mapped node arrays"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json")) as f:
+            self.meta = json.load(f)
+        for name in ARRAYS:
+            setattr(self, name, np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r'))
+        self.feature_names_in_ = np.array(self.meta['feature_names'], dtype=object)
+        self.n_estimators = self.meta['n_trees']
+
+    def predict(self, X) -> np.ndarray:
+        """Predict like the exported estimator (1-D for one output, 2-D otherwise)"""
+        if isinstance(X, pd.DataFrame) and len(self.feature_names_in_):
+            X = X[list(self.feature_names_in_)]
+        # scikit-learn compares float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+
+        out = np.empty((len(X), self.meta['n_outputs']))
+        for begin in range(0, len(X), CHUNK_ROWS):
+            out[begin:begin + CHUNK_ROWS] = self._predict_chunk(X[begin:begin + CHUNK_ROWS])
+
+        if self.meta['target_scale'] is not None:
+            out = out * np.asarray(self.meta['target_scale']) + np.asarray(self.meta['target_offset'])
+        return out[:, 0] if out.shape[1] == 1 else out
+
+    def _predict_chunk(self, X: np.ndarray) -> np.ndarray:
+        """Traverse all trees in lockstep for a block of rows"""
+        flat_X = X.ravel()
+        row_offsets = np.arange(len(X)) * X.shape[1]
+        nodes = np.repeat(np.asarray(self.roots)[:, None], len(X), axis=1)
+        for _ in range(self.meta['max_depth']):
+            go_left = flat_X[row_offsets + self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        leaf_values = self.value[nodes]  # (trees, rows, outputs)
+        if self.meta['kind'] == 'boosting':
+            return np.asarray(self.meta['base']) + self.meta['learning_rate'] * leaf_values.sum(axis=0)
+        return leaf_values.mean(axis=0)